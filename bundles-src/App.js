@@ -101,8 +101,8 @@ class App extends Component {
   }
 
 
-  async getProducts(){
-    let response = await fetch('/api/products/', {
+  async fetchJson(url){
+    let response = await fetch(url, {
       headers: {
         'Accept': 'application/json',
         'Content-Type': 'application/json',
@@ -110,36 +110,39 @@ class App extends Component {
     });
 
     if (!response.ok){
-      return;
+      return null;
     }
-
-    let data = await response.json();
-    this.setState({
-      products : data
-    });
+    return await response.json();
   }
 
-  async getBanners(){
-    let response = await fetch('/api/banners/', {
-      headers: {
-        'Accept': 'application/json',
-        'Content-Type': 'application/json',
+  async getProducts(url, products){
+    while (url){
+      let data = await this.fetchJson(url);
+      if (!data){
+        return;
       }
-    });
+      products = products.concat(data.results);
+      this.setState({
+        products : products
+      });
+      url = data.next;
+    }
+  }
 
-    if (!response.ok){
+  async getStorefront(){
+    let data = await this.fetchJson('/api/storefront/');
+    if (!data){
       return;
     }
-
-    let data = await response.json();
     this.setState({
-      banners : data
+      banners : data.banners,
+      products : data.products.results
     });
+    this.getProducts(data.products.next, data.products.results);
   }
 
   componentDidMount(){
-    this.getProducts();
-    this.getBanners();
+    this.getStorefront();
   }
 
 
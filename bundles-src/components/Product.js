@@ -38,14 +38,18 @@ class Product extends Component{
   }
 
   render(){
-    let image = this.props.product.image;
+    let image = this.props.product.thumbnail;
+    let imageWebp = this.props.product.thumbnail_webp;
     let name = this.props.product.name;
     let price = this.props.product.price;
     let id = this.props.product.id;
     return (
       <div className="product">
         <div className="product-image">
-          <img src={image} alt={name} onClick={this.quickView.bind(this)}/>
+          <picture>
+            {imageWebp && <source srcSet={imageWebp} type="image/webp"/>}
+            <img src={image} alt={name} onClick={this.quickView.bind(this)}/>
+          </picture>
         </div>
         <h4 className="product-name">{name}</h4>
         <p className="product-price currency">{price}</p>
@@ -17,7 +17,10 @@ class QuickView extends Component{
         </Modal.Header>
         <Modal.Body>
           <center>
-            <img src={this.props.product.image} style={imageSizing}/>
+            <picture>
+              {this.props.product.image_webp && <source srcSet={this.props.product.image_webp} type="image/webp"/>}
+              <img src={this.props.product.image} style={imageSizing}/>
+            </picture>
             <div className="container-fluid">
               <Table responsive>
                 <thead>
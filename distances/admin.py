@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from distances.models import Distance
+from distances.models import Distance, DistanceTask
 
 
 @admin.register(Distance)
@@ -22,3 +22,16 @@ class DistanceAdmin(admin.ModelAdmin):
     )
     autocomplete_fields = ['restaurant']
     readonly_fields = ('created_at', 'updated_at')
+
+
+@admin.register(DistanceTask)
+class DistanceTaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'id',
+        'order',
+        'created_at',
+        'available_at',
+        'attempts',
+    )
+    raw_id_fields = ['order']
+    readonly_fields = ('created_at', 'attempts', 'last_error')
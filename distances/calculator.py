@@ -0,0 +1,147 @@
+from distances.models import Distance
+from foodcartapp.eligibility import load_eligible_restaurants
+from foodcartapp.models import Restaurant
+from foodcartapp.spatial_index import get_restaurant_index
+from foodcartapp.yandex_geo import distance_matrix
+from places.addresses import normalize_address
+from places.geocoder import REQUEST_DEADLINE, get_coordinates_many
+
+EXACT_TOP_K = 3
+NEAREST_RESTAURANTS_COUNT = 10
+DELIVERY_RADIUS_KM = 50
+
+
+def find_nearest_restaurants(orders, eligible_restaurants, deadline=REQUEST_DEADLINE):
+    """Вернуть словарь id заказа -> id ближайших ресторанов, готовых его приготовить.
+
+    eligible_restaurants — словарь id заказа -> множество id ресторанов,
+    у которых в продаже весь заказ. Ближайшие из них ищутся по
+    пространственному индексу. Для заказов, координаты которых пока
+    неизвестны, возвращаются любые из подходящих ресторанов.
+    Подходящие рестораны без координат (геокодер был недоступен) в индекс
+    не попадают, поэтому добавляются в конец списка: расстояние до них
+    неизвестно, но скрывать их от менеджера нельзя.
+    """
+    coordinates = get_coordinates_many({order.address for order in orders}, deadline=deadline)
+    index = get_restaurant_index()
+
+    nearest_restaurants = {}
+    for order in orders:
+        restaurant_ids = eligible_restaurants[order.id]
+        order_coordinates = coordinates.get(order.address)
+        if not restaurant_ids or not order_coordinates:
+            nearest_restaurants[order.id] = sorted(restaurant_ids)[:NEAREST_RESTAURANTS_COUNT]
+            continue
+        nearest = index.nearest(
+            order_coordinates,
+            restaurant_ids,
+            k=NEAREST_RESTAURANTS_COUNT,
+            radius_km=DELIVERY_RADIUS_KM,
+        )
+        unlocated = sorted(
+            restaurant_id for restaurant_id in restaurant_ids
+            if restaurant_id not in index
+        )
+        nearest_restaurants[order.id] = [
+            restaurant_id for restaurant_id, _ in nearest
+        ] + unlocated[:NEAREST_RESTAURANTS_COUNT]
+    return nearest_restaurants
+
+
+def calculate_distances(pairs, deadline=REQUEST_DEADLINE):
+    """Посчитать и сохранить расстояния для пар (ресторан, адрес заказа).
+
+    Координаты ресторанов берутся из их полей, геокодируются только адреса
+    заказов, причём одной пачкой. Расстояния сохраняются одним запросом
+    под нормализованным адресом заказа. Пары, для которых координат нет,
+    не сохраняются, чтобы их можно было посчитать позже.
+
+    Возвращает словарь (id ресторана, нормализованный адрес заказа) -> км.
+    """
+    coordinates = get_coordinates_many({order_address for _, order_address in pairs}, deadline=deadline)
+
+    pairs = [
+        (restaurant, order_address)
+        for restaurant, order_address in pairs
+        if restaurant.coordinates and coordinates.get(order_address)
+    ]
+    order_addresses = list({order_address for _, order_address in pairs})
+    restaurants = list({restaurant for restaurant, _ in pairs})
+    matrix = distance_matrix(
+        [coordinates[address] for address in order_addresses],
+        [restaurant.coordinates for restaurant in restaurants],
+        exact_top_k=EXACT_TOP_K,
+    )
+    order_indexes = {address: index for index, address in enumerate(order_addresses)}
+    restaurant_indexes = {restaurant: index for index, restaurant in enumerate(restaurants)}
+
+    distances = {}
+    for restaurant, order_address in pairs:
+        distance_in_km = matrix[
+            order_indexes[order_address],
+            restaurant_indexes[restaurant],
+        ]
+        key = normalize_address(order_address)
+        distances[(restaurant.id, key)] = Distance(
+            restaurant=restaurant,
+            order_address=key,
+            distance=float(distance_in_km),
+        )
+    Distance.objects.bulk_create(distances.values(), ignore_conflicts=True)
+    return {key: distance.distance for key, distance in distances.items()}
+
+
+def load_distances(orders, restaurant_ids):
+    """Загрузить сохранённые расстояния для заказов одним запросом.
+
+    Возвращает словарь (id ресторана, нормализованный адрес заказа) -> км.
+    Строки без расстояния не возвращаются, чтобы пара посчиталась заново.
+    """
+    distances = Distance.objects.filter(
+        restaurant_id__in=restaurant_ids,
+        order_address__in={normalize_address(order.address) for order in orders},
+        distance__isnull=False,
+    ).values_list('restaurant_id', 'order_address', 'distance')
+    return {
+        (restaurant_id, order_address): distance
+        for restaurant_id, order_address, distance in distances
+    }
+
+
+def find_missing_pairs(orders, nearest_restaurants, restaurants, distances):
+    return {
+        (restaurants[restaurant_id], order.address)
+        for order in orders
+        for restaurant_id in nearest_restaurants[order.id]
+        if (restaurant_id, normalize_address(order.address)) not in distances
+    }
+
+
+def precompute_order_distances(orders, deadline=REQUEST_DEADLINE):
+    """Посчитать и сохранить расстояния от заказов до ближайших подходящих ресторанов.
+
+    Возвращает заказы, адреса которых не удалось геокодировать из-за ошибки,
+    разомкнутого предохранителя или deadline: для них ничего не посчитано,
+    и расчёт нужно повторить. Адреса, которых геокодер не нашёл, сюда
+    не попадают: повтор для них ничего не даст.
+    """
+    coordinates = get_coordinates_many({order.address for order in orders}, deadline=deadline)
+    unresolved_orders = [
+        order for order in orders
+        if normalize_address(order.address) and order.address not in coordinates
+    ]
+    unresolved_ids = {order.id for order in unresolved_orders}
+    orders = [order for order in orders if order.id not in unresolved_ids]
+
+    eligible_restaurants = load_eligible_restaurants(orders)
+    nearest_restaurants = find_nearest_restaurants(orders, eligible_restaurants, deadline=deadline)
+    restaurants = Restaurant.objects.in_bulk({
+        restaurant_id
+        for restaurant_ids in nearest_restaurants.values()
+        for restaurant_id in restaurant_ids
+    })
+
+    distances = load_distances(orders, restaurants)
+    missing_pairs = find_missing_pairs(orders, nearest_restaurants, restaurants, distances)
+    calculate_distances(missing_pairs, deadline=deadline)
+    return unresolved_orders
@@ -0,0 +1,69 @@
+import random
+import time
+import timeit
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from geopy import distance
+
+from distances.calculator import EXACT_TOP_K
+from foodcartapp.yandex_geo import KM_PER_DEGREE, distance_matrix
+
+MOSCOW_CENTER = (55.751244, 37.618423)
+
+
+def random_points(count, radius_km=30, center=MOSCOW_CENTER):
+    lat, lon = center
+    spread = radius_km / KM_PER_DEGREE
+    return [
+        (lat + random.uniform(-spread, spread), lon + random.uniform(-spread, spread) * 1.8)
+        for _ in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the vectorized haversine distance matrix with per-pair geopy '
+        'on synthetic order and restaurant coordinates'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=1000)
+        parser.add_argument('--restaurants', type=int, default=200)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument(
+            '--geopy-orders',
+            type=int,
+            default=100,
+            help='Orders to time per-pair geopy on; the result is extrapolated to --orders',
+        )
+
+    def handle(self, *args, **options):
+        random.seed(0)
+        orders = random_points(options['orders'])
+        restaurants = random_points(options['restaurants'])
+        repeat = options['repeat']
+        self.stdout.write(f'{len(orders)} orders x {len(restaurants)} restaurants')
+
+        seconds = min(timeit.repeat(lambda: distance_matrix(orders, restaurants), number=1, repeat=repeat))
+        self.stdout.write(f'{"haversine matrix":<32} {seconds * 1000:>10.1f} ms')
+
+        seconds = min(timeit.repeat(
+            lambda: distance_matrix(orders, restaurants, exact_top_k=EXACT_TOP_K),
+            number=1,
+            repeat=repeat,
+        ))
+        self.stdout.write(f'{f"with exact top-{EXACT_TOP_K}":<32} {seconds * 1000:>10.1f} ms')
+
+        sample = orders[:options['geopy_orders']]
+        started_at = time.perf_counter()
+        exact = np.array([
+            [distance.distance(order, restaurant).km for restaurant in restaurants]
+            for order in sample
+        ])
+        seconds = (time.perf_counter() - started_at) * len(orders) / max(len(sample), 1)
+        self.stdout.write(f'{"per-pair geopy (extrapolated)":<32} {seconds * 1000:>10.1f} ms')
+
+        haversine = distance_matrix(sample, restaurants)
+        error = np.nanmax(np.abs(haversine - exact) / exact) * 100
+        self.stdout.write(self.style.SUCCESS(f'largest haversine error: {error:.2f}%'))
@@ -0,0 +1,80 @@
+import logging
+import time
+import traceback
+
+from django.core.management.base import BaseCommand
+
+from distances.calculator import precompute_order_distances
+from distances.models import DistanceTask
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Compute restaurant distances for queued orders'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling the queue instead of exiting when it is empty',
+        )
+        parser.add_argument('--sleep', type=float, default=5)
+
+    def handle(self, *args, **options):
+        while True:
+            claimed, failed = self.process_batch(options['batch_size'])
+            if claimed:
+                self.stdout.write(f'Processed {claimed - failed} orders, {failed} failed')
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['sleep'])
+        failed_count = DistanceTask.objects.failed().count()
+        if failed_count:
+            self.stdout.write(self.style.WARNING(f'{failed_count} tasks gave up after too many attempts'))
+        self.stdout.write(self.style.SUCCESS('Distance queue is empty'))
+
+    def process_batch(self, batch_size):
+        """Посчитать расстояния для пачки задач вне транзакции с блокировками.
+
+        Если пачка падает, заказы пересчитываются по одному, чтобы отложить
+        только те задачи, которые действительно не удаются. Задачи заказов,
+        адреса которых геокодер не обработал, тоже откладываются, а не
+        удаляются: иначе расстояния для них так и не посчитаются.
+        """
+        tasks = DistanceTask.objects.claim(batch_size)
+        if not tasks:
+            return 0, 0
+
+        errors = {}
+        try:
+            unresolved_orders = precompute_order_distances([task.order for task in tasks], deadline=None)
+        except Exception:
+            unresolved_orders = []
+            for task in tasks:
+                try:
+                    unresolved_orders += precompute_order_distances([task.order], deadline=None)
+                except Exception:
+                    logger.exception('Не удалось посчитать расстояния для заказа %s', task.order_id)
+                    errors[task.pk] = traceback.format_exc()
+
+        unresolved_ids = {order.id for order in unresolved_orders}
+        for task in tasks:
+            if task.order_id in unresolved_ids:
+                errors[task.pk] = f'Не удалось геокодировать адрес {task.order.address}'
+
+        done_tasks = []
+        for task in tasks:
+            if task.pk in errors:
+                task.record_failure(errors[task.pk])
+            else:
+                done_tasks.append(task)
+
+        # Задачу, которую за это время поставили заново (attempts сброшен в 0), не удаляем.
+        DistanceTask.objects.filter(
+            pk__in=[task.pk for task in done_tasks],
+            attempts__gt=0,
+        ).delete()
+        return len(tasks), len(errors)
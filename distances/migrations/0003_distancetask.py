@@ -0,0 +1,27 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0051_alter_order_comment'),
+        ('distances', '0002_alter_distance_order_address'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DistanceTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Время создания')),
+                ('order', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='distance_task', to='foodcartapp.order', verbose_name='Заказ')),
+            ],
+            options={
+                'verbose_name': 'Задача расчёта расстояний',
+                'verbose_name_plural': 'Задачи расчёта расстояний',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('distances', '0003_distancetask'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='distance',
+            name='order_address',
+            field=models.CharField(blank=True, db_index=True, max_length=200, null=True, verbose_name='Адрес заказа'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+from collections import defaultdict
+
+from django.db import migrations
+
+from places.addresses import normalize_address
+
+
+def merge_distances(apps, schema_editor):
+    Distance = apps.get_model('distances', 'Distance')
+
+    groups = defaultdict(list)
+    for distance in Distance.objects.order_by('-updated_at').iterator():
+        key = normalize_address(distance.order_address)
+        groups[(distance.restaurant_id, key)].append(distance)
+
+    for (_, key), distances in groups.items():
+        distances.sort(key=lambda distance: distance.distance is None)
+        kept, duplicates = distances[0], distances[1:]
+        if duplicates:
+            Distance.objects.filter(pk__in=[distance.pk for distance in duplicates]).delete()
+        if kept.order_address != key:
+            kept.order_address = key
+            kept.save(update_fields=['order_address'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('distances', '0004_alter_distance_order_address'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_distances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.2.15 on 2026-10-18 21:09
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('distances', '0005_normalize_order_address'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='distancetask',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0, verbose_name='Попыток'),
+        ),
+        migrations.AddField(
+            model_name='distancetask',
+            name='available_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Доступна с'),
+        ),
+        migrations.AddField(
+            model_name='distancetask',
+            name='last_error',
+            field=models.TextField(blank=True, verbose_name='Последняя ошибка'),
+        ),
+    ]
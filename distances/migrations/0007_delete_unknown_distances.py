@@ -0,0 +1,17 @@
+from django.db import migrations
+
+
+def delete_unknown_distances(apps, schema_editor):
+    Distance = apps.get_model('distances', 'Distance')
+    Distance.objects.filter(distance__isnull=True).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('distances', '0006_distancetask_retries'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_unknown_distances, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,14 @@
-from django.db import models
+from datetime import timedelta
 
-from foodcartapp.models import Restaurant
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from foodcartapp.models import Order, Restaurant
+
+TASK_LEASE = timedelta(minutes=5)
+TASK_MAX_ATTEMPTS = 5
+TASK_RETRY_DELAY = timedelta(seconds=30)
 
 
 class Distance(models.Model):
@@ -12,7 +20,7 @@ class Distance(models.Model):
     )
     order_address = models.CharField(
         verbose_name='Адрес заказа',
-        max_length=100,
+        max_length=200,
         blank=True,
         null=True,
         db_index=True
@@ -38,3 +46,88 @@ class Distance(models.Model):
         unique_together = (
             ('restaurant', 'order_address'),
         )
+
+
+class DistanceTaskQuerySet(models.QuerySet):
+    def enqueue(self, order):
+        return self.update_or_create(order=order, defaults={
+            'attempts': 0,
+            'available_at': timezone.now(),
+            'last_error': '',
+        })[0]
+
+    def ready(self):
+        return self.filter(available_at__lte=timezone.now(), attempts__lt=TASK_MAX_ATTEMPTS)
+
+    def claim(self, batch_size, lease=TASK_LEASE):
+        """Забрать задачи в работу и отпустить блокировки сразу.
+
+        Строки блокируются только на время короткой транзакции, в которой
+        задачам переносится available_at на срок аренды и увеличивается
+        счётчик попыток. Пока аренда не истекла, другие обработчики эти задачи
+        не видят. Если обработчик упадёт, задачи вернутся в очередь сами.
+        """
+        with transaction.atomic():
+            # of=('self',): в PostgreSQL без него блокировались бы и строки
+            # заказов, и задачи заказов, открытых в админке, пропускались бы.
+            tasks = list(
+                self.ready().select_for_update(skip_locked=True, of=('self',)).select_related(
+                    'order'
+                ).order_by('available_at', 'created_at')[:batch_size]
+            )
+            self.filter(pk__in=[task.pk for task in tasks]).update(
+                available_at=timezone.now() + lease,
+                attempts=F('attempts') + 1,
+            )
+        for task in tasks:
+            task.attempts += 1
+        return tasks
+
+    def failed(self):
+        return self.filter(attempts__gte=TASK_MAX_ATTEMPTS)
+
+
+class DistanceTask(models.Model):
+    order = models.OneToOneField(
+        Order,
+        on_delete=models.CASCADE,
+        related_name='distance_task',
+        verbose_name='Заказ'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Время создания'
+    )
+    available_at = models.DateTimeField(
+        default=timezone.now,
+        db_index=True,
+        verbose_name='Доступна с'
+    )
+    attempts = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Попыток'
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка'
+    )
+
+    objects = DistanceTaskQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Задача расчёта расстояний'
+        verbose_name_plural = 'Задачи расчёта расстояний'
+
+    def __str__(self):
+        return f"{self.order}"
+
+    def record_failure(self, error):
+        """Отложить задачу с растущей задержкой и запомнить ошибку.
+
+        После TASK_MAX_ATTEMPTS попыток задача остаётся в таблице,
+        но обработчик её больше не берёт.
+        """
+        self.available_at = timezone.now() + TASK_RETRY_DELAY * 2 ** (self.attempts - 1)
+        self.last_error = error
+        self.save(update_fields=['available_at', 'last_error'])
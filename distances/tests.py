@@ -0,0 +1,77 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from distances.calculator import find_missing_pairs, load_distances
+from distances.models import Distance, DistanceTask
+from foodcartapp.models import Order, Product, ProductCategory, Restaurant, RestaurantMenuItem
+from foodcartapp.serializers import OrderSerializer
+from places.addresses import normalize_address
+from places.backends import get_geocoder
+from places.geocoder import FAILURE_THRESHOLD, coordinates_cache, geocoder_breaker
+
+
+@override_settings(GEOCODER={'BACKEND': 'places.backends.SyntheticGeocoder', 'OPTIONS': {}})
+class ComputeDistancesTest(TestCase):
+    def setUp(self):
+        get_geocoder.cache_clear()
+        self.addCleanup(get_geocoder.cache_clear)
+        coordinates_cache.clear()
+        geocoder_breaker.record_success()
+        self.addCleanup(cache.delete, geocoder_breaker.open_key)
+
+        category = ProductCategory.objects.create(name='Бургеры')
+        product = Product.objects.create(name='Бургер', price=100, image='burger.jpg', category=category)
+        for index in range(2):
+            restaurant = Restaurant.objects.create(name=f'Ресторан {index}', address=f'Москва, Тверская {index}')
+            RestaurantMenuItem.objects.create(restaurant=restaurant, product=product)
+        for index in range(2):
+            serializer = OrderSerializer(data={
+                'firstname': 'Иван',
+                'lastname': 'Петров',
+                'phonenumber': '+79991234567',
+                'address': f'Москва, Арбат {index}',
+                'products': [{'product': product.id, 'quantity': 1}],
+            })
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+
+    def compute_distances(self):
+        output = StringIO()
+        call_command('compute_distances', stdout=output)
+        return output.getvalue()
+
+    def test_distances_are_saved_and_tasks_deleted(self):
+        output = self.compute_distances()
+
+        self.assertIn('Processed 2 orders, 0 failed', output)
+        self.assertEqual(Distance.objects.count(), 4)
+        self.assertFalse(DistanceTask.objects.exists())
+
+    def test_tasks_stay_queued_while_breaker_is_open(self):
+        geocoder_breaker.record_failure(FAILURE_THRESHOLD)
+        self.assertTrue(geocoder_breaker.is_open())
+
+        output = self.compute_distances()
+
+        self.assertIn('Processed 0 orders, 2 failed', output)
+        self.assertFalse(Distance.objects.exists())
+        tasks = DistanceTask.objects.all()
+        self.assertEqual(len(tasks), 2)
+        for task in tasks:
+            self.assertEqual(task.attempts, 1)
+            self.assertIn('Не удалось геокодировать адрес', task.last_error)
+        self.assertFalse(DistanceTask.objects.ready().exists())
+
+    def test_unknown_distance_is_computed_again(self):
+        order = Order.objects.first()
+        restaurant = Restaurant.objects.first()
+        Distance.objects.create(restaurant=restaurant, order_address=normalize_address(order.address), distance=None)
+
+        distances = load_distances([order], [restaurant.id])
+        missing_pairs = find_missing_pairs([order], {order.id: [restaurant.id]}, {restaurant.id: restaurant}, distances)
+
+        self.assertEqual(distances, {})
+        self.assertEqual(missing_pairs, {(restaurant, order.address)})
@@ -5,6 +5,9 @@ from django.templatetags.static import static
 from django.utils.html import format_html
 from django.utils.http import url_has_allowed_host_and_scheme
 
+from distances.models import DistanceTask
+from .eligibility import refresh_order_eligibility
+from .models import Banner
 from .models import Product, Order, OrderProduct
 from .models import ProductCategory
 from .models import Restaurant
@@ -28,9 +31,22 @@ class RestaurantAdmin(admin.ModelAdmin):
         'address',
         'contact_phone',
     ]
+    readonly_fields = [
+        'lat',
+        'lon',
+    ]
     inlines = [
         RestaurantMenuItemInline
     ]
+    actions = [
+        'update_coordinates',
+    ]
+
+    def update_coordinates(self, request, queryset):
+        restaurants = queryset.update_coordinates()
+        self.message_user(request, f'Координаты обновлены у {len(restaurants)} ресторанов')
+
+    update_coordinates.short_description = 'Обновить координаты'
 
 
 @admin.register(Product)
@@ -40,6 +56,7 @@ class ProductAdmin(admin.ModelAdmin):
         'name',
         'category',
         'price',
+        'get_restaurants_count',
     ]
     list_display_links = [
         'name',
@@ -48,10 +65,7 @@ class ProductAdmin(admin.ModelAdmin):
         'category',
     ]
     search_fields = [
-        # FIXME SQLite can not convert letter case for cyrillic words properly, so search will be buggy.
-        # Migration to PostgreSQL is necessary
-        'name',
-        'category__name',
+        'search_name',
     ]
 
     inlines = [
@@ -92,7 +106,8 @@ class ProductAdmin(admin.ModelAdmin):
     def get_image_preview(self, obj):
         if not obj.image:
             return 'выберите картинку'
-        return format_html('<img src="{url}" style="max-height: 200px;"/>', url=obj.image.url)
+        preview = obj.thumbnail or obj.image
+        return format_html('<img src="{url}" style="max-height: 200px;"/>', url=preview.url)
 
     get_image_preview.short_description = 'превью'
 
@@ -100,11 +115,26 @@ class ProductAdmin(admin.ModelAdmin):
         if not obj.image or not obj.id:
             return 'нет картинки'
         edit_url = reverse('admin:foodcartapp_product_change', args=(obj.id,))
+        preview = obj.thumbnail or obj.image
         return format_html('<a href="{edit_url}"><img src="{src}" style="max-height: 50px;"/></a>', edit_url=edit_url,
-                           src=obj.image.url)
+                           src=preview.url)
 
     get_image_list_preview.short_description = 'превью'
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_restaurants_count()
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return queryset.search(search_term), False
+
+    def get_restaurants_count(self, obj):
+        return obj.restaurants_count
+
+    get_restaurants_count.short_description = 'в продаже в ресторанах'
+    get_restaurants_count.admin_order_field = 'restaurants_count'
+
 
 @admin.register(ProductCategory)
 class ProductAdmin(admin.ModelAdmin):
@@ -120,7 +150,8 @@ class OrderProductInline(admin.TabularInline):
 class OrderAdmin(admin.ModelAdmin):
     list_display = [
         'id',
-        'address'
+        'address',
+        'total'
     ]
     inlines = [
         OrderProductInline
@@ -135,6 +166,7 @@ class OrderAdmin(admin.ModelAdmin):
                 'status',
                 'payment_method',
                 'comment',
+                'total',
                 'created_at',
                 'called_at',
                 'delivered_at',
@@ -143,7 +175,12 @@ class OrderAdmin(admin.ModelAdmin):
         }),
     )
     autocomplete_fields = ['restaurant']
-    readonly_fields = ('created_at',)
+    readonly_fields = ('created_at', 'total')
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if 'address' in form.changed_data:
+            DistanceTask.objects.enqueue(obj)
 
     def save_formset(self, request, form, formset, change):
         instances = formset.save(commit=False)
@@ -155,6 +192,12 @@ class OrderAdmin(admin.ModelAdmin):
             instance.created_by = request.user
             instance.save()
         formset.save_m2m()
+        if formset.model is OrderProduct:
+            form.instance.update_total()
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        refresh_order_eligibility([form.instance])
 
     def response_change(self, request, obj):
         res = super(OrderAdmin, self).response_change(request, obj)
@@ -162,3 +205,37 @@ class OrderAdmin(admin.ModelAdmin):
         if next_url and url_has_allowed_host_and_scheme(url=next_url, allowed_hosts={request.get_host()}):
             return HttpResponseRedirect(next_url)
         return res
+
+
+@admin.register(Banner)
+class BannerAdmin(admin.ModelAdmin):
+    list_display = [
+        'get_image_list_preview',
+        'title',
+        'order',
+        'active_from',
+        'active_to',
+    ]
+    list_display_links = [
+        'title',
+    ]
+    list_editable = [
+        'order',
+    ]
+    readonly_fields = [
+        'get_image_preview',
+    ]
+
+    def get_image_preview(self, obj):
+        if not obj.image:
+            return 'выберите картинку'
+        return format_html('<img src="{url}" style="max-height: 200px;"/>', url=obj.image.url)
+
+    get_image_preview.short_description = 'превью'
+
+    def get_image_list_preview(self, obj):
+        if not obj.image:
+            return 'нет картинки'
+        return format_html('<img src="{src}" style="max-height: 50px;"/>', src=obj.image.url)
+
+    get_image_list_preview.short_description = 'превью'
@@ -0,0 +1,57 @@
+from collections import namedtuple
+
+from django.db.models import Min
+from django.utils import timezone
+
+from foodcartapp.caching import VersionedValue
+from foodcartapp.fast_json import dumps
+from foodcartapp.models import Banner
+
+BANNERS_MAX_AGE = 60
+
+Banners = namedtuple('Banners', ['items', 'content', 'expires_at'])
+
+
+def serialize_banner(banner):
+    return {
+        'title': banner.title,
+        'src': banner.image.url,
+        'text': banner.text,
+    }
+
+
+def build_banners():
+    now = timezone.now()
+    banners = list(Banner.objects.active(now))
+    next_start = Banner.objects.filter(active_from__gt=now).aggregate(
+        next_start=Min('active_from')
+    )['next_start']
+    boundaries = [banner.active_to for banner in banners if banner.active_to]
+    if next_start:
+        boundaries.append(next_start)
+
+    items = [serialize_banner(banner) for banner in banners]
+    return Banners(items, dumps(items), min(boundaries, default=None))
+
+
+banners = VersionedValue(['banners'], build_banners)
+
+
+def get_banners():
+    """Вернуть активные баннеры и их готовый JSON.
+
+    Список живёт в памяти процесса, пока сигналы не изменят баннеры
+    или пока не наступит ближайшее начало или конец показа какого-то баннера.
+    """
+    value = banners.get()
+    if value.expires_at and value.expires_at <= timezone.now():
+        banners.invalidate()
+        value = banners.get()
+    return value
+
+
+def get_banners_max_age(value):
+    if not value.expires_at:
+        return BANNERS_MAX_AGE
+    seconds_left = (value.expires_at - timezone.now()).total_seconds()
+    return max(0, min(BANNERS_MAX_AGE, int(seconds_left)))
@@ -0,0 +1,42 @@
+from uuid import uuid4
+
+from django.core.cache import cache
+
+
+def new_version():
+    return uuid4().hex
+
+
+def get_cache_version(name):
+    return cache.get_or_set(f'{name}_version', new_version, timeout=None)
+
+
+def bump_cache_version(name):
+    # Новая случайная версия вместо incr: в кэше в базе incr не атомарен,
+    # а версия, вытесненная из кэша, не совпадёт ни с одной старой.
+    cache.set(f'{name}_version', new_version(), timeout=None)
+
+
+class VersionedValue:
+    """Значение, которое живёт в памяти процесса до смены версии в кэше.
+
+    Версию меняют сигналы при изменении исходных данных. Кэш общий
+    для всех процессов (по умолчанию таблица в базе, см. CACHE_URL),
+    поэтому каждый процесс пересоберёт значение при следующем обращении.
+    """
+
+    def __init__(self, names, build):
+        self.names = names
+        self.build = build
+        self._version = None
+        self._value = None
+
+    def get(self):
+        version = tuple(get_cache_version(name) for name in self.names)
+        if self._version != version:
+            self._value = self.build()
+            self._version = version
+        return self._value
+
+    def invalidate(self):
+        self._version = None
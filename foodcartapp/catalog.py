@@ -0,0 +1,150 @@
+import heapq
+from bisect import bisect_left
+from collections import defaultdict, namedtuple
+
+from foodcartapp.caching import VersionedValue
+from foodcartapp.models import Product, RestaurantMenuItem
+from foodcartapp.search import SEARCH_RESULTS_LIMIT, get_search_terms
+
+PRODUCT_FIELDS = (
+    'id', 'name', 'price', 'special_status', 'description', 'category',
+    'image', 'image_webp', 'thumbnail', 'thumbnail_webp',
+)
+PRODUCTS_PAGE_SIZE = 20
+PRODUCTS_MAX_PAGE_SIZE = 100
+
+Catalog = namedtuple('Catalog', ['products', 'restaurant_products', 'search_names', 'search_words'])
+
+
+def serialize_product(product):
+    return {
+        'id': product.id,
+        'name': product.name,
+        'price': product.price,
+        'special_status': product.special_status,
+        'description': product.description,
+        'category': {
+            'id': product.category.id,
+            'name': product.category.name,
+        } if product.category else None,
+        'image': product.image.url,
+        'image_webp': product.image_webp.url if product.image_webp else None,
+        'thumbnail': product.thumbnail.url if product.thumbnail else product.image.url,
+        'thumbnail_webp': product.thumbnail_webp.url if product.thumbnail_webp else None,
+    }
+
+
+def build_catalog():
+    products = Product.objects.select_related('category').available().order_by('id')
+
+    restaurant_products = defaultdict(set)
+    menu_items = RestaurantMenuItem.objects.filter(
+        availability=True
+    ).values_list('restaurant_id', 'product_id')
+    for restaurant_id, product_id in menu_items:
+        restaurant_products[restaurant_id].add(product_id)
+
+    products = list(products)
+    search_names = [product.search_name for product in products]
+    search_words = sorted({
+        (word, position)
+        for position, search_name in enumerate(search_names)
+        for word in search_name.split()
+    })
+
+    return Catalog(
+        [serialize_product(product) for product in products],
+        dict(restaurant_products),
+        search_names,
+        search_words,
+    )
+
+
+catalog = VersionedValue(['catalog'], build_catalog)
+
+
+def get_catalog():
+    """Вернуть каталог товаров в продаже, упорядоченный по id.
+
+    Каталог собирается один раз и живёт в памяти процесса, пока сигналы
+    не изменят товары, категории или меню ресторанов.
+    """
+    return catalog.get()
+
+
+def select_products(category=None, special=None, restaurant=None, after=None,
+                    fields=None, limit=PRODUCTS_PAGE_SIZE):
+    """Вернуть страницу каталога и id её последнего товара, если дальше есть ещё.
+
+    after — id последнего товара предыдущей страницы, fields — поля, которые
+    нужно оставить у товаров. Фильтры применяются к каталогу в памяти,
+    поэтому запросов к базе нет.
+    """
+    catalog = get_catalog()
+    restaurant_products = catalog.restaurant_products.get(restaurant, set())
+
+    page = []
+    has_more = False
+    for product in catalog.products:
+        if after is not None and product['id'] <= after:
+            continue
+        if category is not None and (product['category'] or {}).get('id') != category:
+            continue
+        if special is not None and product['special_status'] != special:
+            continue
+        if restaurant is not None and product['id'] not in restaurant_products:
+            continue
+        if len(page) == limit:
+            has_more = True
+            break
+        page.append(product)
+
+    last_id = page[-1]['id'] if has_more else None
+    return select_fields(page, fields), last_id
+
+
+def select_fields(products, fields):
+    if not fields:
+        return products
+    return [
+        {field: product[field] for field in PRODUCT_FIELDS if field in fields}
+        for product in products
+    ]
+
+
+def find_word_prefix(search_words, term):
+    positions = set()
+    for word, position in search_words[bisect_left(search_words, (term,)):]:
+        if not word.startswith(term):
+            break
+        positions.add(position)
+    return positions
+
+
+def search_products(query, limit=SEARCH_RESULTS_LIMIT):
+    """Найти товары в продаже, у которых каждое слово запроса начинает слово названия.
+
+    Поиск идёт по отсортированному списку слов каталога в памяти, поэтому
+    запросов к базе нет. Сначала идут товары, название которых начинается
+    с запроса целиком, дальше — по алфавиту.
+    """
+    terms = get_search_terms(query)
+    if not terms:
+        return []
+    catalog = get_catalog()
+
+    positions = None
+    for term in sorted(terms, key=len, reverse=True):
+        term_positions = find_word_prefix(catalog.search_words, term)
+        positions = term_positions if positions is None else positions & term_positions
+        if not positions:
+            return []
+
+    prefix = ' '.join(terms)
+    names = catalog.search_names
+    found = heapq.nsmallest(
+        limit,
+        positions,
+        key=lambda position: (not names[position].startswith(prefix), names[position], position),
+    )
+    return [catalog.products[position] for position in found]
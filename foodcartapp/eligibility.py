@@ -0,0 +1,87 @@
+from collections import defaultdict
+
+from foodcartapp.matching import build_menu_matrix
+from foodcartapp.models import EligibleRestaurant, Order, OrderProduct, RestaurantMenuItem
+
+
+def load_order_products(order_ids):
+    order_products = defaultdict(set)
+    rows = OrderProduct.objects.filter(
+        order_id__in=order_ids
+    ).values_list('order_id', 'product_id')
+    for order_id, product_id in rows:
+        order_products[order_id].add(product_id)
+    return order_products
+
+
+def refresh_order_eligibility(orders):
+    """Пересчитать рестораны, готовые приготовить заказы целиком.
+
+    Ресторан подходит, если у него в продаже все товары заказа. Состав заказов
+    и меню по этим товарам читаются из базы, а не из кэша процесса: результат
+    сохраняется, и устаревшее меню осталось бы в нём до следующего пересчёта.
+    """
+    order_ids = [order.id for order in orders]
+    order_products = load_order_products(order_ids)
+    product_ids = set().union(*order_products.values())
+    eligible = build_menu_matrix(product_ids).eligible(order_products)
+
+    EligibleRestaurant.objects.filter(order_id__in=order_ids).delete()
+    EligibleRestaurant.objects.bulk_create(
+        EligibleRestaurant(order_id=order_id, restaurant_id=restaurant_id)
+        for order_id, restaurant_ids in eligible.items()
+        for restaurant_id in restaurant_ids
+    )
+
+
+def refresh_menu_item_eligibility(restaurant_id, product_id):
+    """Пересчитать один ресторан для незакрытых заказов с этим товаром.
+
+    Вызывается при создании, удалении и смене доступности пункта меню,
+    поэтому затрагивает только заказы, на которые это изменение влияет.
+    """
+    order_ids = list(
+        OrderProduct.objects
+        .filter(product_id=product_id)
+        .exclude(order__status=Order.StatusChoices.DELIVERED)
+        .values_list('order_id', flat=True)
+        .distinct()
+    )
+    if not order_ids:
+        return
+
+    order_products = load_order_products(order_ids)
+    menu = set(
+        RestaurantMenuItem.objects.filter(
+            restaurant_id=restaurant_id,
+            availability=True,
+        ).values_list('product_id', flat=True)
+    )
+    eligible_order_ids = [
+        order_id
+        for order_id, product_ids in order_products.items()
+        if product_ids <= menu
+    ]
+
+    EligibleRestaurant.objects.filter(
+        restaurant_id=restaurant_id,
+        order_id__in=order_ids,
+    ).exclude(order_id__in=eligible_order_ids).delete()
+    EligibleRestaurant.objects.bulk_create(
+        [
+            EligibleRestaurant(order_id=order_id, restaurant_id=restaurant_id)
+            for order_id in eligible_order_ids
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def load_eligible_restaurants(orders):
+    """Вернуть словарь id заказа -> множество id подходящих ресторанов одним запросом."""
+    eligible_restaurants = defaultdict(set)
+    rows = EligibleRestaurant.objects.filter(
+        order__in=orders
+    ).values_list('order_id', 'restaurant_id')
+    for order_id, restaurant_id in rows:
+        eligible_restaurants[order_id].add(restaurant_id)
+    return eligible_restaurants
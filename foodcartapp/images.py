@@ -0,0 +1,77 @@
+import logging
+import os
+from collections import namedtuple
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = (300, 300)
+WEBP_MAX_SIZE = (1200, 1200)
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+
+Derivative = namedtuple('Derivative', ['field', 'size', 'format', 'extension'])
+
+DERIVATIVES = [
+    Derivative('thumbnail', THUMBNAIL_SIZE, 'JPEG', 'jpg'),
+    Derivative('thumbnail_webp', THUMBNAIL_SIZE, 'WEBP', 'webp'),
+    Derivative('image_webp', WEBP_MAX_SIZE, 'WEBP', 'webp'),
+]
+DERIVATIVE_FIELDS = [derivative.field for derivative in DERIVATIVES]
+
+
+def render_derivative(image, derivative):
+    image = image.copy()
+    image.thumbnail(derivative.size, Image.LANCZOS)
+
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    if derivative.format == 'JPEG':
+        if has_alpha:
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, 'white')
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        else:
+            image = image.convert('RGB')
+        options = {'quality': JPEG_QUALITY, 'optimize': True, 'progressive': True}
+    else:
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+        options = {'quality': WEBP_QUALITY}
+
+    buffer = BytesIO()
+    image.save(buffer, derivative.format, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def generate_derivatives(product):
+    """Пересоздать уменьшенные копии и WebP-версии картинки товара.
+
+    Файлы сохраняются в хранилище, а поля товара меняются без сохранения
+    в базу. Старые копии удаляются. Если картинку не удалось прочитать,
+    поля остаются пустыми, витрина показывает оригинал, а функция
+    возвращает False.
+    """
+    for field in DERIVATIVE_FIELDS:
+        getattr(product, field).delete(save=False)
+    if not product.image:
+        return False
+
+    try:
+        with product.image.open('rb') as file:
+            image = ImageOps.exif_transpose(Image.open(file))
+            image.load()
+    except (OSError, ValueError) as error:
+        logger.warning('Не удалось прочитать картинку товара %s: %s', product.pk, error)
+        return False
+
+    stem = os.path.splitext(os.path.basename(product.image.name))[0]
+    for derivative in DERIVATIVES:
+        getattr(product, derivative.field).save(
+            f'{stem}_{derivative.field}.{derivative.extension}',
+            render_derivative(image, derivative),
+            save=False,
+        )
+    return True
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from foodcartapp.models import Order
+
+
+class Command(BaseCommand):
+    help = 'Recalculate the stored total of every order from its products'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        order_ids = list(Order.objects.order_by('id').values_list('id', flat=True))
+
+        batch_size = options['batch_size']
+        updated = 0
+        for start in range(0, len(order_ids), batch_size):
+            orders = list(
+                Order.objects
+                .filter(id__in=order_ids[start:start + batch_size])
+                .with_calculated_total()
+            )
+            changed_orders = []
+            for order in orders:
+                if order.total != order.calculated_total:
+                    order.total = order.calculated_total
+                    changed_orders.append(order)
+            with transaction.atomic():
+                Order.objects.bulk_update(changed_orders, ['total'])
+            updated += len(changed_orders)
+        self.stdout.write(self.style.SUCCESS(f'Updated totals of {updated} of {len(order_ids)} orders'))
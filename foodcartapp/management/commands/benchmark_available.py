@@ -0,0 +1,90 @@
+import random
+import timeit
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from foodcartapp.models import Product, ProductCategory, Restaurant, RestaurantMenuItem
+
+MENU_INDEX_NAME = 'menu_item_product_available'
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare query plans and timings of Product.objects.available() and its variants '
+        'on synthetic menus. The data is created in a transaction and rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--menu-items', type=int, default=100_000)
+        parser.add_argument('--products', type=int, default=500)
+        parser.add_argument('--available-ratio', type=float, default=0.3)
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            restaurant = self.create_menus(
+                options['menu_items'],
+                options['products'],
+                options['available_ratio'],
+            )
+            queries = [
+                (
+                    'IN subquery (old available)',
+                    Product.objects.filter(
+                        pk__in=RestaurantMenuItem.objects.filter(availability=True).values_list('product')
+                    ),
+                ),
+                ('EXISTS (available)', Product.objects.available()),
+                ('EXISTS (available_at)', Product.objects.available_at(restaurant)),
+                ('restaurants count', Product.objects.with_restaurants_count()),
+            ]
+            for name, queryset in queries:
+                self.report(name, queryset, options['repeat'])
+            transaction.set_rollback(True)
+
+    def create_menus(self, menu_items_count, products_count, available_ratio):
+        random.seed(0)
+        category = ProductCategory.objects.create(name='benchmark')
+        Product.objects.bulk_create(
+            Product(name=f'benchmark {index}', price=100, image='benchmark.jpg', category=category)
+            for index in range(products_count)
+        )
+        Restaurant.objects.bulk_create(
+            Restaurant(name=f'benchmark {index}', address=f'benchmark {index}', contact_phone='')
+            for index in range(max(1, menu_items_count // products_count))
+        )
+        # bulk_create возвращает id не во всех СУБД, поэтому перечитываем их.
+        product_ids = list(Product.objects.filter(category=category).values_list('id', flat=True))
+        restaurant_ids = list(
+            Restaurant.objects.filter(address__startswith='benchmark ').values_list('id', flat=True)
+        )
+        RestaurantMenuItem.objects.bulk_create(
+            (
+                RestaurantMenuItem(
+                    restaurant_id=restaurant_id,
+                    product_id=product_id,
+                    availability=random.random() < available_ratio,
+                )
+                for restaurant_id in restaurant_ids
+                for product_id in product_ids
+            ),
+            batch_size=5000,
+        )
+        with connection.cursor() as cursor:
+            for model in (Product, Restaurant, RestaurantMenuItem):
+                cursor.execute(f'ANALYZE {model._meta.db_table}')
+        self.stdout.write(
+            f'{RestaurantMenuItem.objects.count()} menu items, {Product.objects.count()} products'
+        )
+        return restaurant_ids[0]
+
+    def report(self, name, queryset, repeat):
+        queryset = queryset.values_list('id', *queryset.query.annotations)
+        plan = queryset.explain()
+        seconds = min(timeit.repeat(lambda: list(queryset.all()), number=1, repeat=repeat))
+        uses_index = 'yes' if MENU_INDEX_NAME in plan else 'no'
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'{name}: {seconds * 1000:.2f} ms, {MENU_INDEX_NAME} used: {uses_index}'
+        ))
+        self.stdout.write(plan)
@@ -0,0 +1,64 @@
+import json
+import timeit
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+
+from foodcartapp import fast_json
+from foodcartapp.catalog import serialize_product
+from foodcartapp.models import Product, ProductCategory
+
+
+def build_products(count):
+    categories = [ProductCategory(id=index, name=f'Категория {index}') for index in range(1, 11)]
+    return [
+        Product(
+            id=index,
+            name=f'Бургер {index}',
+            price=Decimal('199.00') + index,
+            special_status=index % 5 == 0,
+            description='Сочная котлета, свежие овощи и фирменный соус на мягкой булочке.',
+            category=categories[index % len(categories)],
+            image=f'burger-{index}.jpg',
+        )
+        for index in range(1, count + 1)
+    ]
+
+
+def encode_pretty(data):
+    return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False, indent=4).encode('utf-8')
+
+
+def encode_compact(data):
+    return json.dumps(
+        data,
+        cls=fast_json.FastJSONEncoder,
+        ensure_ascii=False,
+        separators=(',', ':'),
+    ).encode('utf-8')
+
+
+class Command(BaseCommand):
+    help = 'Compare payload size and encode time of the JSON encoders on a synthetic catalog'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        catalog = [serialize_product(product) for product in build_products(options['products'])]
+
+        encoders = [
+            ('json, indent=4 (old JsonResponse)', encode_pretty),
+            ('json, compact', encode_compact),
+        ]
+        if fast_json.orjson is not None:
+            encoders.append(('orjson', fast_json.dumps))
+        else:
+            self.stdout.write('orjson is not installed, skipping it')
+
+        for name, encode in encoders:
+            payload = encode(catalog)
+            seconds = min(timeit.repeat(lambda: encode(catalog), number=1, repeat=options['repeat']))
+            self.stdout.write(f'{name:<36} {len(payload):>9} bytes {seconds * 1000:>8.2f} ms')
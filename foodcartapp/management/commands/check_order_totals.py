@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from foodcartapp.models import Order
+
+
+class Command(BaseCommand):
+    help = 'Report orders whose stored total differs from the sum of their products'
+
+    def handle(self, *args, **options):
+        orders = (
+            Order.objects
+            .with_calculated_total()
+            .values_list('id', 'total', 'calculated_total')
+            .order_by('id')
+        )
+        mismatches = 0
+        for order_id, total, calculated_total in orders.iterator():
+            if total != calculated_total:
+                mismatches += 1
+                self.stdout.write(f'Order {order_id}: stored {total}, products sum to {calculated_total}')
+
+        if mismatches:
+            raise CommandError(
+                f'{mismatches} orders have a wrong total, run backfill_order_totals to fix them'
+            )
+        self.stdout.write(self.style.SUCCESS('All order totals are consistent'))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from foodcartapp.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Create thumbnails and WebP versions of product images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Regenerate derivatives for every product, not only those without them',
+        )
+
+    def handle(self, *args, **options):
+        products = Product.objects.exclude(image='').order_by('id')
+        if not options['all']:
+            products = products.filter(thumbnail='')
+
+        generated = failed = 0
+        for product in products.iterator():
+            if product.update_image_derivatives():
+                generated += 1
+            else:
+                failed += 1
+        self.stdout.write(self.style.SUCCESS(f'Generated image derivatives for {generated} products'))
+        if failed:
+            self.stdout.write(self.style.WARNING(f'Could not read the images of {failed} products'))
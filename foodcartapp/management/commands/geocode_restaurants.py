@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from foodcartapp.models import Restaurant
+
+
+class Command(BaseCommand):
+    help = 'Fill in restaurant coordinates from their addresses'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Geocode every restaurant, not only those without coordinates',
+        )
+
+    def handle(self, *args, **options):
+        restaurants = Restaurant.objects.all()
+        if not options['all']:
+            restaurants = restaurants.filter(lat__isnull=True)
+        total = restaurants.count()
+        restaurants = restaurants.update_coordinates(deadline=None)
+        self.stdout.write(self.style.SUCCESS(f'Geocoded {len(restaurants)} of {total} restaurants'))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from foodcartapp.eligibility import refresh_order_eligibility
+from foodcartapp.models import Order
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the table of restaurants able to cook each open order'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Rebuild delivered orders as well, not only open ones',
+        )
+
+    def handle(self, *args, **options):
+        orders = Order.objects.order_by('id')
+        if not options['all']:
+            orders = orders.exclude(status=Order.StatusChoices.DELIVERED)
+        order_ids = list(orders.values_list('id', flat=True))
+
+        batch_size = options['batch_size']
+        for start in range(0, len(order_ids), batch_size):
+            batch = Order.objects.filter(id__in=order_ids[start:start + batch_size])
+            with transaction.atomic():
+                refresh_order_eligibility(list(batch))
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt eligibility for {len(order_ids)} orders'))
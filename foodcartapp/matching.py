@@ -0,0 +1,78 @@
+from collections import namedtuple
+
+import numpy as np
+
+from foodcartapp.models import RestaurantMenuItem
+
+OrderMatrix = namedtuple('OrderMatrix', ['order_ids', 'products', 'complete'])
+
+
+class MenuMatrix:
+    """Меню всех ресторанов в виде булевой матрицы рестораны × товары.
+
+    Товары получают плотные номера столбцов, поэтому проверка «у ресторана
+    есть весь заказ» для всех пар заказ-ресторан сводится к одному
+    умножению матриц вместо операций над множествами для каждой пары.
+    """
+
+    def __init__(self, restaurant_ids, product_ids, available):
+        self.restaurant_ids = np.asarray(restaurant_ids, dtype=np.int64)
+        self.product_indexes = {product_id: index for index, product_id in enumerate(product_ids)}
+        available = np.asarray(available, dtype=bool).reshape(len(restaurant_ids), len(product_ids))
+        # Счётчики пропущенных товаров точны во float32, а BLAS умножает его быстрее целых.
+        self.missing = (~available).T.astype(np.float32)
+
+    def __len__(self):
+        return len(self.restaurant_ids)
+
+    def order_matrix(self, order_products):
+        """Разложить состав заказов по столбцам матрицы меню.
+
+        Заказ с товаром, которого нет в продаже ни в одном ресторане,
+        помечается как неполный: подходящих ресторанов у него нет.
+        """
+        order_ids = list(order_products)
+        products = np.zeros((len(order_ids), len(self.product_indexes)), dtype=np.float32)
+        complete = np.ones(len(order_ids), dtype=bool)
+        for row, order_id in enumerate(order_ids):
+            for product_id in order_products[order_id]:
+                column = self.product_indexes.get(product_id)
+                if column is None:
+                    complete[row] = False
+                else:
+                    products[row, column] = 1
+        return OrderMatrix(order_ids, products, complete)
+
+    def eligible(self, order_products):
+        """Вернуть словарь id заказа -> id ресторанов, у которых в продаже весь заказ.
+
+        order_products — словарь id заказа -> множество id товаров.
+        """
+        orders = self.order_matrix(order_products)
+        missing_counts = orders.products @ self.missing
+        fits = (missing_counts == 0) & orders.complete[:, np.newaxis]
+        return {
+            order_id: self.restaurant_ids[row].tolist()
+            for order_id, row in zip(orders.order_ids, fits)
+        }
+
+
+def build_menu_matrix(product_ids=None):
+    """Прочитать меню из базы и собрать матрицу.
+
+    Если передан product_ids, в матрицу попадают только эти товары:
+    для проверки заказов остальные столбцы не нужны.
+    """
+    menu_items = RestaurantMenuItem.objects.filter(availability=True)
+    if product_ids is not None:
+        menu_items = menu_items.filter(product_id__in=product_ids)
+    menu_items = list(menu_items.values_list('restaurant_id', 'product_id'))
+    restaurant_ids = sorted({restaurant_id for restaurant_id, _ in menu_items})
+    product_ids = sorted({product_id for _, product_id in menu_items})
+    restaurant_indexes = {restaurant_id: index for index, restaurant_id in enumerate(restaurant_ids)}
+    product_indexes = {product_id: index for index, product_id in enumerate(product_ids)}
+
+    available = np.zeros((len(restaurant_ids), len(product_ids)), dtype=bool)
+    for restaurant_id, product_id in menu_items:
+        available[restaurant_indexes[restaurant_id], product_indexes[product_id]] = True
+    return MenuMatrix(restaurant_ids, product_ids, available)
@@ -0,0 +1,27 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0052_auto_20261018_2034'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EligibleRestaurant',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='eligible_restaurants', to='foodcartapp.order', verbose_name='Заказ')),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='eligible_orders', to='foodcartapp.restaurant', verbose_name='Ресторан')),
+            ],
+            options={
+                'verbose_name': 'Ресторан, готовый приготовить заказ',
+                'verbose_name_plural': 'Рестораны, готовые приготовить заказы',
+                'unique_together': {('order', 'restaurant')},
+            },
+        ),
+    ]
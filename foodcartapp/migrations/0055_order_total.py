@@ -0,0 +1,34 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:49
+
+import django.core.validators
+from django.db import migrations, models
+from django.db.models import DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_totals(apps, schema_editor):
+    Order = apps.get_model('foodcartapp', 'Order')
+    OrderProduct = apps.get_model('foodcartapp', 'OrderProduct')
+    money = DecimalField(max_digits=12, decimal_places=2)
+    totals = OrderProduct.objects.filter(
+        order=OuterRef('pk')
+    ).values('order').annotate(
+        total=Sum(ExpressionWrapper(F('price') * F('quantity'), output_field=money))
+    ).values('total')
+    Order.objects.update(total=Coalesce(Subquery(totals, output_field=money), Value(0), output_field=money))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0054_order_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='total',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0, max_digits=12, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Стоимость заказа'),
+        ),
+        migrations.RunPython(fill_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0055_order_total'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='image_webp',
+            field=models.ImageField(blank=True, editable=False, upload_to='derivatives/', verbose_name='картинка WebP'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='thumbnail',
+            field=models.ImageField(blank=True, editable=False, upload_to='derivatives/', verbose_name='миниатюра'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='thumbnail_webp',
+            field=models.ImageField(blank=True, editable=False, upload_to='derivatives/', verbose_name='миниатюра WebP'),
+        ),
+    ]
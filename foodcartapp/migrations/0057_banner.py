@@ -0,0 +1,59 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:53
+
+from django.contrib.staticfiles import finders
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+INITIAL_BANNERS = [
+    ('Burger', 'burger.jpg', 'Tasty Burger at your door step'),
+    ('Spices', 'food.jpg', 'All Cuisines'),
+    ('New York', 'tasty.jpg', 'Food is incomplete without a tasty dessert'),
+]
+
+
+def create_initial_banners(apps, schema_editor):
+    """Создать стартовые баннеры из картинок в static.
+
+    Картинка копируется в хранилище под постоянным именем и только если её
+    там ещё нет: миграция выполняется и при создании тестовой базы, и копии
+    со случайными суффиксами копились бы в MEDIA_ROOT при каждом запуске.
+    """
+    Banner = apps.get_model('foodcartapp', 'Banner')
+    for order, (title, filename, text) in enumerate(INITIAL_BANNERS):
+        path = finders.find(filename)
+        if not path:
+            continue
+        name = f'banners/{filename}'
+        if not default_storage.exists(name):
+            with open(path, 'rb') as file:
+                name = default_storage.save(name, File(file))
+        Banner.objects.create(title=title, text=text, order=order, image=name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0056_product_image_derivatives'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Banner',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=50, verbose_name='заголовок')),
+                ('text', models.CharField(blank=True, max_length=200, verbose_name='текст')),
+                ('image', models.ImageField(upload_to='banners/', verbose_name='картинка')),
+                ('order', models.PositiveIntegerField(db_index=True, default=0, verbose_name='порядок')),
+                ('active_from', models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='показывать с')),
+                ('active_to', models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='показывать до')),
+            ],
+            options={
+                'verbose_name': 'баннер',
+                'verbose_name_plural': 'баннеры',
+                'ordering': ['order', 'id'],
+            },
+        ),
+        migrations.RunPython(create_initial_banners, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+from django.db import migrations, models
+
+from foodcartapp.search import normalize_search_text
+
+TRIGRAM_INDEX_NAME = 'product_search_name_trgm'
+
+
+def fill_search_names(apps, schema_editor):
+    Product = apps.get_model('foodcartapp', 'Product')
+    products = list(Product.objects.only('id', 'name'))
+    for product in products:
+        product.search_name = normalize_search_text(product.name)
+    Product.objects.bulk_update(products, ['search_name'], batch_size=1000)
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {TRIGRAM_INDEX_NAME} '
+        f'ON foodcartapp_product USING gin (search_name gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {TRIGRAM_INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0058_menu_item_product_available'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_name',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=100, verbose_name='название для поиска'),
+        ),
+        migrations.RunPython(fill_search_names, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -1,9 +1,44 @@
+from decimal import Decimal
+
 from django.core.validators import MinValueValidator
 from django.db import models
-from django.db.models import Sum, F, FloatField
+from django.db.models import Count, DecimalField, Exists, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from phonenumber_field.modelfields import PhoneNumberField
 
+from foodcartapp.caching import bump_cache_version
+from foodcartapp.images import DERIVATIVE_FIELDS, generate_derivatives
+from foodcartapp.search import SEARCH_NAME_MAX_LENGTH, get_search_terms, normalize_search_text
+from places.geocoder import REQUEST_DEADLINE, get_coordinates, get_coordinates_many
+
+
+class RestaurantQuerySet(models.QuerySet):
+    def with_coordinates(self):
+        return self.filter(lat__isnull=False, lon__isnull=False)
+
+    def update_coordinates(self, deadline=REQUEST_DEADLINE):
+        restaurants = list(self)
+        coordinates = get_coordinates_many(
+            (restaurant.address for restaurant in restaurants),
+            deadline=deadline,
+        )
+
+        geocoded_restaurants = []
+        for restaurant in restaurants:
+            if restaurant.address not in coordinates:
+                continue
+            old_coordinates = restaurant.lat, restaurant.lon
+            restaurant.lat, restaurant.lon = coordinates[restaurant.address] or (None, None)
+            if old_coordinates != (None, None) and old_coordinates != (restaurant.lat, restaurant.lon):
+                restaurant.distances.all().delete()
+            geocoded_restaurants.append(restaurant)
+
+        self.model.objects.bulk_update(geocoded_restaurants, ['lat', 'lon'])
+        bump_cache_version('restaurants')
+        return geocoded_restaurants
+
 
 class Restaurant(models.Model):
     name = models.CharField(
@@ -15,12 +50,24 @@ class Restaurant(models.Model):
         max_length=100,
         blank=True,
     )
+    lat = models.FloatField(
+        'широта',
+        null=True,
+        blank=True,
+    )
+    lon = models.FloatField(
+        'долгота',
+        null=True,
+        blank=True,
+    )
     contact_phone = models.CharField(
         'контактный телефон',
         max_length=50,
         blank=True,
     )
 
+    objects = RestaurantQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'ресторан'
         verbose_name_plural = 'рестораны'
@@ -28,15 +75,77 @@ class Restaurant(models.Model):
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'address' in field_names:
+            instance._loaded_address = instance.address
+        return instance
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        address_changed = adding or self.address != getattr(self, '_loaded_address', self.address)
+        if address_changed:
+            self.lat, self.lon = get_coordinates(self.address) or (None, None)
+        super().save(*args, **kwargs)
+        if address_changed and not adding:
+            self.distances.all().delete()
+        self._loaded_address = self.address
+
+    @property
+    def coordinates(self):
+        if self.lat is None or self.lon is None:
+            return None
+        return self.lat, self.lon
+
 
 class ProductQuerySet(models.QuerySet):
     def available(self):
-        products = (
+        """Товары, которые в продаже хотя бы в одном ресторане."""
+        return self.filter(Exists(
+            RestaurantMenuItem.objects.filter(product=OuterRef('pk'), availability=True)
+        ))
+
+    def available_at(self, restaurant):
+        """Товары, которые в продаже в данном ресторане."""
+        return self.filter(Exists(
+            RestaurantMenuItem.objects.filter(
+                product=OuterRef('pk'),
+                restaurant=restaurant,
+                availability=True,
+            )
+        ))
+
+    def with_restaurants_count(self):
+        """Добавить restaurants_count — число ресторанов, где товар в продаже."""
+        restaurants_count = (
             RestaurantMenuItem.objects
-            .filter(availability=True)
-            .values_list('product')
+            .filter(product=OuterRef('pk'), availability=True)
+            .order_by()
+            .values('product')
+            .annotate(count=Count('pk'))
+            .values('count')
+        )
+        return self.annotate(
+            restaurants_count=Coalesce(Subquery(restaurants_count), Value(0))
         )
-        return self.filter(pk__in=products)
+
+    def search(self, query):
+        """Товары, в названии которых каждое слово запроса начинает какое-то слово.
+
+        Сравнение идёт с нормализованным search_name, поэтому не зависит
+        от регистра и от ё/е. Выдача упорядочена по search_name, чтобы
+        база могла идти по индексу и остановиться на нужном числе строк.
+        """
+        terms = get_search_terms(query)
+        if not terms:
+            return self.none()
+        products = self
+        for term in terms:
+            products = products.filter(
+                Q(search_name__startswith=term) | Q(search_name__contains=f' {term}')
+            )
+        return products.order_by('search_name', 'id')
 
 
 class ProductCategory(models.Model):
@@ -75,6 +184,24 @@ class Product(models.Model):
     image = models.ImageField(
         'картинка'
     )
+    thumbnail = models.ImageField(
+        'миниатюра',
+        upload_to='derivatives/',
+        blank=True,
+        editable=False,
+    )
+    thumbnail_webp = models.ImageField(
+        'миниатюра WebP',
+        upload_to='derivatives/',
+        blank=True,
+        editable=False,
+    )
+    image_webp = models.ImageField(
+        'картинка WebP',
+        upload_to='derivatives/',
+        blank=True,
+        editable=False,
+    )
     special_status = models.BooleanField(
         'спец.предложение',
         default=False,
@@ -85,6 +212,13 @@ class Product(models.Model):
         max_length=200,
         blank=True,
     )
+    search_name = models.CharField(
+        'название для поиска',
+        max_length=SEARCH_NAME_MAX_LENGTH,
+        blank=True,
+        editable=False,
+        db_index=True,
+    )
 
     objects = ProductQuerySet.as_manager()
 
@@ -95,6 +229,29 @@ class Product(models.Model):
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'image' in field_names:
+            instance._loaded_image = instance.image.name
+        return instance
+
+    def save(self, *args, **kwargs):
+        image_changed = self._state.adding or self.image.name != getattr(self, '_loaded_image', self.image.name)
+        self.search_name = normalize_search_text(self.name)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'name' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'search_name'}
+        super().save(*args, **kwargs)
+        if image_changed:
+            self.update_image_derivatives()
+        self._loaded_image = self.image.name
+
+    def update_image_derivatives(self):
+        generated = generate_derivatives(self)
+        super().save(update_fields=DERIVATIVE_FIELDS)
+        return generated
+
 
 class RestaurantMenuItem(models.Model):
     restaurant = models.ForeignKey(
@@ -121,16 +278,33 @@ class RestaurantMenuItem(models.Model):
         unique_together = [
             ['restaurant', 'product']
         ]
+        indexes = [
+            models.Index(fields=['product', 'availability'], name='menu_item_product_available'),
+        ]
 
     def __str__(self):
         return f"{self.restaurant.name} - {self.product.name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'product_id' in field_names:
+            instance._loaded_product_id = instance.product_id
+        return instance
+
+
+ORDER_TOTAL_FIELD = DecimalField(max_digits=12, decimal_places=2)
+
 
 class OrderQuerySet(models.QuerySet):
-    def order_price(self):
+    def with_calculated_total(self):
+        """Посчитать стоимость заказов заново по их товарам — для сверки с полем total."""
         return self.annotate(
-            price_sum=Sum(F('products__price') * F('products__quantity'),
-                          output_field=FloatField())
+            calculated_total=Coalesce(
+                Sum(F('products__price') * F('products__quantity'), output_field=ORDER_TOTAL_FIELD),
+                Value(Decimal(0)),
+                output_field=ORDER_TOTAL_FIELD,
+            )
         )
 
 
@@ -177,6 +351,11 @@ class Order(models.Model):
         db_index=True,
         verbose_name='Время создания'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name='Время изменения'
+    )
     called_at = models.DateTimeField(
         null=True,
         blank=True,
@@ -196,6 +375,14 @@ class Order(models.Model):
         db_index=True,
         verbose_name='Способ оплаты'
     )
+    total = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        db_index=True,
+        validators=[MinValueValidator(0)],
+        verbose_name='Стоимость заказа'
+    )
     restaurant = models.ForeignKey(
         to=Restaurant,
         related_name='orders',
@@ -219,6 +406,13 @@ class Order(models.Model):
     def client_full_name(self):
         return f"{self.client_name} {self.client_lastname}"
 
+    def update_total(self):
+        self.total = sum(
+            (order_product.price * order_product.quantity for order_product in self.products.all()),
+            Decimal(0),
+        )
+        self.save(update_fields=['total', 'updated_at'])
+
 
 class OrderProduct(models.Model):
     order = models.ForeignKey(
@@ -254,3 +448,80 @@ class OrderProduct(models.Model):
 
     def set_price(self):
         self.price = self.product.price
+
+
+class EligibleRestaurant(models.Model):
+    order = models.ForeignKey(
+        to=Order,
+        on_delete=models.CASCADE,
+        related_name='eligible_restaurants',
+        verbose_name='Заказ'
+    )
+    restaurant = models.ForeignKey(
+        to=Restaurant,
+        on_delete=models.CASCADE,
+        related_name='eligible_orders',
+        verbose_name='Ресторан'
+    )
+
+    class Meta:
+        verbose_name = 'Ресторан, готовый приготовить заказ'
+        verbose_name_plural = 'Рестораны, готовые приготовить заказы'
+        unique_together = [
+            ['order', 'restaurant']
+        ]
+
+    def __str__(self):
+        return f"{self.order} - {self.restaurant}"
+
+
+class BannerQuerySet(models.QuerySet):
+    def active(self, moment=None):
+        moment = moment or timezone.now()
+        return self.filter(
+            Q(active_from__isnull=True) | Q(active_from__lte=moment),
+            Q(active_to__isnull=True) | Q(active_to__gt=moment),
+        )
+
+
+class Banner(models.Model):
+    title = models.CharField(
+        'заголовок',
+        max_length=50
+    )
+    text = models.CharField(
+        'текст',
+        max_length=200,
+        blank=True
+    )
+    image = models.ImageField(
+        'картинка',
+        upload_to='banners/'
+    )
+    order = models.PositiveIntegerField(
+        'порядок',
+        default=0,
+        db_index=True
+    )
+    active_from = models.DateTimeField(
+        'показывать с',
+        null=True,
+        blank=True,
+        db_index=True
+    )
+    active_to = models.DateTimeField(
+        'показывать до',
+        null=True,
+        blank=True,
+        db_index=True
+    )
+
+    objects = BannerQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'баннер'
+        verbose_name_plural = 'баннеры'
+        ordering = ['order', 'id']
+
+    def __str__(self):
+        return self.title
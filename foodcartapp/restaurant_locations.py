@@ -0,0 +1,24 @@
+from collections import namedtuple
+
+import numpy as np
+
+from foodcartapp.caching import VersionedValue
+from foodcartapp.models import Restaurant
+
+RestaurantLocations = namedtuple('RestaurantLocations', ['ids', 'coordinates'])
+
+
+def load_restaurant_locations():
+    rows = list(
+        Restaurant.objects.with_coordinates().order_by('id').values_list('id', 'lat', 'lon')
+    )
+    ids = np.array([restaurant_id for restaurant_id, _, _ in rows], dtype=np.int64)
+    coordinates = np.array([(lat, lon) for _, lat, lon in rows], dtype=np.float64).reshape(-1, 2)
+    return RestaurantLocations(ids, coordinates)
+
+
+restaurant_locations = VersionedValue(['restaurants'], load_restaurant_locations)
+
+
+def get_restaurant_locations():
+    return restaurant_locations.get()
@@ -0,0 +1,21 @@
+import re
+
+SEARCH_NAME_MAX_LENGTH = 100
+SEARCH_RESULTS_LIMIT = 20
+SEARCH_MAX_RESULTS_LIMIT = 100
+
+NON_WORD_RE = re.compile(r'[\W_]+')
+
+
+def normalize_search_text(text):
+    """Привести текст к виду для поиска: регистр сложен, ё заменена на е.
+
+    Знаки препинания превращаются в пробелы, так что «Чизбургер-пицца»
+    станет «чизбургер пицца» и найдётся по началу любого из слов.
+    """
+    text = text.casefold().replace('ё', 'е')
+    return NON_WORD_RE.sub(' ', text).strip()[:SEARCH_NAME_MAX_LENGTH]
+
+
+def get_search_terms(query):
+    return normalize_search_text(query).split()
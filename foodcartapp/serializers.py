@@ -2,10 +2,18 @@ from django.db import transaction
 from phonenumber_field.serializerfields import PhoneNumberField
 from rest_framework import serializers
 
-from foodcartapp.models import Order, OrderProduct
+from distances.models import DistanceTask
+from foodcartapp.eligibility import refresh_order_eligibility
+from foodcartapp.models import Order, OrderProduct, Product
+from places.addresses import clean_address
+
+PRODUCT_DOES_NOT_EXIST = serializers.PrimaryKeyRelatedField.default_error_messages['does_not_exist']
 
 
 class OrderProductSerializer(serializers.ModelSerializer):
+    # Товары проверяются пачкой в OrderSerializer.validate_products, а не запросом на строку.
+    product = serializers.IntegerField(source='product_id', min_value=1)
+
     class Meta:
         model = OrderProduct
         fields = (
@@ -38,19 +46,52 @@ class OrderSerializer(serializers.ModelSerializer):
             'products'
         )
 
+    def validate_address(self, value):
+        return clean_address(value)
+
+    def validate_products(self, value):
+        """Загрузить товары всех строк заказа одним запросом.
+
+        Несуществующие id собираются вместе, ошибка приходит у каждой такой
+        строки. Найденные товары кладутся в строки, и цены потом берутся
+        из них без новых запросов.
+        """
+        products = Product.objects.in_bulk({line['product_id'] for line in value})
+        errors = [
+            {} if line['product_id'] in products else {
+                'product': [PRODUCT_DOES_NOT_EXIST.format(pk_value=line['product_id'])]
+            }
+            for line in value
+        ]
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+        for line in value:
+            line['product'] = products[line.pop('product_id')]
+        return value
+
     @transaction.atomic
     def create(self, validated_data):
         order_products_details = validated_data.pop('products')
+        order_products = []
+        for product_data in order_products_details:
+            order_product = OrderProduct(**product_data)
+            order_product.set_price()
+            order_products.append(order_product)
+
         order = Order.objects.create(
             client_name=validated_data['client_name'],
             client_lastname=validated_data['client_lastname'],
             phone=validated_data['phone'],
-            address=validated_data['address']
+            address=validated_data['address'],
+            total=sum(
+                order_product.price * order_product.quantity
+                for order_product in order_products
+            ),
         )
-        order_products = []
-        for product_data in order_products_details:
-            order_product = OrderProduct(order=order, **product_data)
-            order_product.set_price()
-            order_products.append(order_product)
+        for order_product in order_products:
+            order_product.order = order
         OrderProduct.objects.bulk_create(order_products)
+        refresh_order_eligibility([order])
+        DistanceTask.objects.create(order=order)
         return order
@@ -0,0 +1,37 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from foodcartapp.caching import bump_cache_version
+from foodcartapp.eligibility import refresh_menu_item_eligibility
+from foodcartapp.models import Banner, Product, ProductCategory, Restaurant, RestaurantMenuItem
+
+
+@receiver(post_save, sender=Restaurant)
+@receiver(post_delete, sender=Restaurant)
+def invalidate_restaurants(sender, **kwargs):
+    bump_cache_version('restaurants')
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductCategory)
+@receiver(post_delete, sender=ProductCategory)
+@receiver(post_save, sender=RestaurantMenuItem)
+@receiver(post_delete, sender=RestaurantMenuItem)
+def invalidate_catalog(sender, **kwargs):
+    bump_cache_version('catalog')
+
+
+@receiver(post_save, sender=Banner)
+@receiver(post_delete, sender=Banner)
+def invalidate_banners(sender, **kwargs):
+    bump_cache_version('banners')
+
+
+@receiver(post_save, sender=RestaurantMenuItem)
+@receiver(post_delete, sender=RestaurantMenuItem)
+def update_eligibility(sender, instance, **kwargs):
+    product_ids = {instance.product_id, getattr(instance, '_loaded_product_id', instance.product_id)}
+    for product_id in product_ids:
+        refresh_menu_item_eligibility(instance.restaurant_id, product_id)
+    instance._loaded_product_id = instance.product_id
@@ -0,0 +1,107 @@
+import math
+from collections import defaultdict
+
+import numpy as np
+
+from foodcartapp.caching import VersionedValue
+from foodcartapp.restaurant_locations import get_restaurant_locations
+from foodcartapp.yandex_geo import KM_PER_DEGREE, distance_matrix
+
+CELL_SIZE_KM = 2
+
+
+class RestaurantIndex:
+    """Сетка из квадратных ячеек над координатами ресторанов.
+
+    Поиск идёт кольцами ячеек от ячейки заказа и останавливается, как только
+    найдено k ресторанов ближе уже просмотренного радиуса, поэтому
+    просматриваются только рестораны поблизости, а не вся сеть.
+    """
+
+    def __init__(self, ids, coordinates, cell_size_km=CELL_SIZE_KM):
+        self.ids = ids.tolist()
+        self.located_ids = set(self.ids)
+        self.coordinates = coordinates
+        self.cell_size_km = cell_size_km
+        self.lat_step = cell_size_km / KM_PER_DEGREE
+
+        max_abs_lat = np.abs(coordinates[:, 0]).max() if len(coordinates) else 0
+        self.lon_step = cell_size_km / (KM_PER_DEGREE * max(math.cos(math.radians(max_abs_lat)), 0.01))
+
+        self.cells = defaultdict(list)
+        for index, (lat, lon) in enumerate(coordinates):
+            self.cells[self.cell_of(lat, lon)].append(index)
+
+        rows = [row for row, _ in self.cells]
+        columns = [column for _, column in self.cells]
+        self.bounds = (min(rows, default=0), max(rows, default=0),
+                       min(columns, default=0), max(columns, default=0))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, restaurant_id):
+        return restaurant_id in self.located_ids
+
+    def cell_of(self, lat, lon):
+        return math.floor(lat / self.lat_step), math.floor(lon / self.lon_step)
+
+    def ring(self, center, radius):
+        row, column = center
+        if radius == 0:
+            yield center
+            return
+        for offset in range(-radius, radius + 1):
+            yield row - radius, column + offset
+            yield row + radius, column + offset
+        for offset in range(-radius + 1, radius):
+            yield row + offset, column - radius
+            yield row + offset, column + radius
+
+    def max_ring(self, center):
+        row, column = center
+        min_row, max_row, min_column, max_column = self.bounds
+        return max(abs(row - min_row), abs(row - max_row), abs(column - min_column), abs(column - max_column))
+
+    def nearest(self, point, restaurant_ids=None, k=None, radius_km=None):
+        """Вернуть [(id ресторана, расстояние в км)] в порядке удалённости.
+
+        Если передан restaurant_ids, учитываются только эти рестораны.
+        """
+        center = self.cell_of(*point)
+        max_ring = self.max_ring(center)
+
+        found = []
+        for radius in range(max_ring + 1):
+            candidates = [
+                index
+                for cell in self.ring(center, radius)
+                for index in self.cells.get(cell, ())
+                if restaurant_ids is None or self.ids[index] in restaurant_ids
+            ]
+            if candidates:
+                distances = distance_matrix([point], self.coordinates[candidates])[0]
+                found.extend(zip(distances.tolist(), candidates))
+
+            covered_km = radius * self.cell_size_km
+            if radius_km is not None and covered_km >= radius_km:
+                break
+            if k is not None and sum(distance <= covered_km for distance, _ in found) >= k:
+                break
+
+        found.sort()
+        if radius_km is not None:
+            found = [(distance, index) for distance, index in found if distance <= radius_km]
+        return [(self.ids[index], distance) for distance, index in found[:k]]
+
+
+def build_restaurant_index():
+    locations = get_restaurant_locations()
+    return RestaurantIndex(locations.ids, locations.coordinates)
+
+
+restaurant_index = VersionedValue(['restaurants'], build_restaurant_index)
+
+
+def get_restaurant_index():
+    return restaurant_index.get()
@@ -0,0 +1,395 @@
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from urllib.parse import parse_qs, urlparse
+
+from django.db import connection
+from django.urls import reverse
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from foodcartapp import yandex_geo
+from foodcartapp.management.commands.benchmark_available import MENU_INDEX_NAME
+from foodcartapp.models import EligibleRestaurant, Order, Product, ProductCategory, Restaurant, RestaurantMenuItem
+from foodcartapp.serializers import OrderSerializer
+from places.backends import get_geocoder
+from places.geocoder import coordinates_cache, geocoder_breaker, get_coordinates_many
+
+
+class StubGeocoderHandler(BaseHTTPRequestHandler):
+    """Отвечает как геокодер Яндекса: адрес «N» находится в точке (N, N)."""
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            time.sleep(server.latency)
+            address = parse_qs(urlparse(self.path).query)['geocode'][0]
+            if address == 'error':
+                self.send_response(500)
+                self.end_headers()
+                return
+            if address == 'nowhere':
+                members = []
+            else:
+                members = [{'GeoObject': {'Point': {'pos': f'{address} {address}'}}}]
+            body = json.dumps({'response': {'GeoObjectCollection': {'featureMember': members}}}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubGeocoderMixin:
+    latency = 0.2
+
+    def setUp(self):
+        super().setUp()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubGeocoderHandler)
+        self.server.latency = self.latency
+        self.server.lock = Lock()
+        self.server.active = 0
+        self.server.max_active = 0
+        self.thread = Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = f'http://127.0.0.1:{self.server.server_port}/'
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        super().tearDown()
+
+
+class FetchCoordinatesManyTest(StubGeocoderMixin, SimpleTestCase):
+    def fetch(self, addresses, **kwargs):
+        kwargs.setdefault('max_workers', 8)
+        kwargs.setdefault('deadline', None)
+        return yandex_geo.fetch_coordinates_many('key', addresses, base_url=self.url, **kwargs)
+
+    def test_requests_run_concurrently(self):
+        addresses = [str(number) for number in range(16)]
+
+        started_at = time.monotonic()
+        coordinates, failed = self.fetch(addresses)
+        elapsed = time.monotonic() - started_at
+
+        self.assertEqual(coordinates, {address: (address, address) for address in addresses})
+        self.assertEqual(failed, [])
+        self.assertEqual(self.server.max_active, 8)
+        # Последовательно 16 запросов заняли бы 3,2 с, пачками по 8 — около 0,4 с.
+        self.assertLess(elapsed, 16 * self.latency / 2)
+
+    def test_duplicates_and_empty_addresses_are_fetched_once(self):
+        coordinates, _ = self.fetch(['1', '1', '', '2'], max_workers=1)
+
+        self.assertEqual(coordinates, {'1': ('1', '1'), '2': ('2', '2')})
+        self.assertEqual(self.server.max_active, 1)
+
+    def test_failed_requests_are_left_out(self):
+        with self.assertLogs('foodcartapp.yandex_geo', level='ERROR'):
+            coordinates, failed = self.fetch(['1', 'error', 'nowhere'])
+
+        self.assertEqual(coordinates, {'1': ('1', '1'), 'nowhere': None})
+        self.assertEqual(failed, ['error'])
+
+    def test_requests_after_deadline_are_not_sent(self):
+        addresses = [str(number) for number in range(6)]
+
+        coordinates, failed = self.fetch(addresses, max_workers=2, deadline=self.latency / 2)
+
+        self.assertEqual(coordinates, {'0': ('0', '0'), '1': ('1', '1')})
+        self.assertEqual(failed, [])
+
+
+class GetCoordinatesManyDeadlineTest(StubGeocoderMixin, TestCase):
+    latency = 0.1
+
+    def setUp(self):
+        super().setUp()
+        settings_override = override_settings(GEOCODER={
+            'BACKEND': 'places.backends.YandexGeocoder',
+            'OPTIONS': {'api_key': 'key', 'url': self.url, 'max_workers': 2},
+        })
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        get_geocoder.cache_clear()
+        self.addCleanup(get_geocoder.cache_clear)
+        coordinates_cache.clear()
+        geocoder_breaker.record_success()
+        self.addresses = [str(number) for number in range(12)]
+
+    def test_skipped_addresses_do_not_open_breaker(self):
+        # Успевают начаться две волны по max_workers=2 запроса: в 0 с и через 0,1 с.
+        coordinates = get_coordinates_many(self.addresses, deadline=self.latency * 1.5)
+
+        self.assertEqual(len(coordinates), 4)
+        self.assertFalse(geocoder_breaker.is_open())
+
+    def test_without_deadline_every_address_is_fetched(self):
+        coordinates = get_coordinates_many(self.addresses, deadline=None)
+
+        self.assertEqual(coordinates, {address: (float(address), float(address)) for address in self.addresses})
+        self.assertFalse(geocoder_breaker.is_open())
+
+    def test_request_errors_open_breaker(self):
+        with self.assertLogs('foodcartapp.yandex_geo', level='ERROR'):
+            for _ in range(5):
+                get_coordinates_many(['error'], deadline=None)
+
+        self.assertTrue(geocoder_breaker.is_open())
+
+
+class AvailableProductsPlanTest(TestCase):
+    def test_available_uses_menu_index(self):
+        if connection.vendor == 'postgresql':
+            # На пустых таблицах планировщик выберет полный просмотр, проверяем, что индекс подходит.
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+        plan = Product.objects.available().explain()
+
+        self.assertIn(MENU_INDEX_NAME, plan)
+
+
+@override_settings(GEOCODER={'BACKEND': 'places.backends.SyntheticGeocoder', 'OPTIONS': {}})
+class MenuItemEligibilityTest(TestCase):
+    """Изменение пункта меню пересчитывает только затронутые незакрытые заказы."""
+
+    def setUp(self):
+        get_geocoder.cache_clear()
+        self.addCleanup(get_geocoder.cache_clear)
+        category = ProductCategory.objects.create(name='Бургеры')
+        self.burger, self.fries, self.cola = (
+            Product.objects.create(name=name, price=100, image='burger.jpg', category=category)
+            for name in ['Бургер', 'Картошка', 'Кола']
+        )
+        self.first = Restaurant.objects.create(name='Первый', address='Москва, Тверская 1')
+        self.second = Restaurant.objects.create(name='Второй', address='Москва, Тверская 2')
+        RestaurantMenuItem.objects.create(restaurant=self.first, product=self.burger)
+        RestaurantMenuItem.objects.create(restaurant=self.first, product=self.fries)
+        RestaurantMenuItem.objects.create(restaurant=self.second, product=self.burger)
+
+        self.burger_order = self.create_order([self.burger])
+        self.combo_order = self.create_order([self.burger, self.fries])
+        self.cola_order = self.create_order([self.cola])
+        self.delivered_order = self.create_order([self.burger, self.fries])
+        Order.objects.filter(id=self.delivered_order.id).update(status=Order.StatusChoices.DELIVERED)
+
+    def create_order(self, products):
+        serializer = OrderSerializer(data={
+            'firstname': 'Иван',
+            'lastname': 'Петров',
+            'phonenumber': '+79991234567',
+            'address': 'Москва, Арбат 1',
+            'products': [{'product': product.id, 'quantity': 1} for product in products],
+        })
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    def get_menu_item(self, restaurant, product):
+        return RestaurantMenuItem.objects.get(restaurant=restaurant, product=product)
+
+    def assert_eligible(self, order, restaurants):
+        self.assertEqual(
+            set(EligibleRestaurant.objects.filter(order=order).values_list('restaurant_id', flat=True)),
+            {restaurant.id for restaurant in restaurants},
+        )
+
+    def test_order_needs_every_product(self):
+        self.assert_eligible(self.burger_order, [self.first, self.second])
+        self.assert_eligible(self.combo_order, [self.first])
+        self.assert_eligible(self.cola_order, [])
+
+    def test_created_item_adds_restaurant(self):
+        RestaurantMenuItem.objects.create(restaurant=self.second, product=self.fries)
+
+        self.assert_eligible(self.combo_order, [self.first, self.second])
+        self.assert_eligible(self.delivered_order, [self.first])
+
+    def test_deleted_item_removes_restaurant(self):
+        self.get_menu_item(self.first, self.fries).delete()
+
+        self.assert_eligible(self.combo_order, [])
+        self.assert_eligible(self.burger_order, [self.first, self.second])
+        self.assert_eligible(self.delivered_order, [self.first])
+
+    def test_availability_toggle(self):
+        menu_item = self.get_menu_item(self.first, self.burger)
+
+        menu_item.availability = False
+        menu_item.save()
+        self.assert_eligible(self.burger_order, [self.second])
+        self.assert_eligible(self.combo_order, [])
+        self.assert_eligible(self.delivered_order, [self.first])
+
+        menu_item.availability = True
+        menu_item.save()
+        self.assert_eligible(self.burger_order, [self.first, self.second])
+        self.assert_eligible(self.combo_order, [self.first])
+
+    def test_item_moved_to_another_product(self):
+        menu_item = self.get_menu_item(self.first, self.fries)
+        menu_item.product = self.cola
+        menu_item.save()
+
+        self.assert_eligible(self.combo_order, [])
+        self.assert_eligible(self.cola_order, [self.first])
+        self.assert_eligible(self.delivered_order, [self.first])
+
+    def test_toggle_keeps_rows_of_unaffected_orders(self):
+        burger_rows = set(EligibleRestaurant.objects.filter(order=self.burger_order).values_list('id', flat=True))
+        menu_item = self.get_menu_item(self.first, self.fries)
+
+        menu_item.availability = False
+        menu_item.save()
+
+        self.assertEqual(
+            set(EligibleRestaurant.objects.filter(order=self.burger_order).values_list('id', flat=True)),
+            burger_rows,
+        )
+
+
+@override_settings(GEOCODER={'BACKEND': 'places.backends.SyntheticGeocoder', 'OPTIONS': {}})
+class RegisterOrderTest(TestCase):
+    """Число запросов при создании заказа не зависит от числа строк."""
+
+    def setUp(self):
+        get_geocoder.cache_clear()
+        self.addCleanup(get_geocoder.cache_clear)
+        category = ProductCategory.objects.create(name='Бургеры')
+        self.products = [
+            Product.objects.create(name=f'Бургер {index}', price=100 + index, image='burger.jpg', category=category)
+            for index in range(30)
+        ]
+        for index in range(3):
+            restaurant = Restaurant.objects.create(name=f'Ресторан {index}', address=f'Москва, Тверская {index}')
+            for product in self.products[index:]:
+                RestaurantMenuItem.objects.create(restaurant=restaurant, product=product)
+
+    def post_order(self, product_ids):
+        return self.client.post('/api/order/', {
+            'firstname': 'Иван',
+            'lastname': 'Петров',
+            'phonenumber': '+79991234567',
+            'address': 'Москва, Арбат 1',
+            'products': [{'product': product_id, 'quantity': 2} for product_id in product_ids],
+        }, content_type='application/json')
+
+    def assert_order_queries(self, lines_count):
+        # товары строк; SAVEPOINT, заказ, строки заказа, состав заказа и меню по его товарам,
+        # удаление и вставка подходящих ресторанов, задача расстояний, RELEASE SAVEPOINT;
+        # строки заказа для ответа
+        with self.assertNumQueries(11):
+            response = self.post_order([product.id for product in self.products[:lines_count]])
+
+        self.assertEqual(response.status_code, 201)
+        order = Order.objects.get(id=response.json()['id'])
+        self.assertEqual(order.products.count(), lines_count)
+        self.assertEqual(order.total, sum(product.price * 2 for product in self.products[:lines_count]))
+
+    def test_order_with_one_line(self):
+        self.assert_order_queries(1)
+
+    def test_order_with_many_lines(self):
+        self.assert_order_queries(30)
+
+    def test_unknown_products_are_reported_together(self):
+        known_id = self.products[0].id
+        with self.assertNumQueries(1):
+            response = self.post_order([known_id, 100_000, known_id, 100_001])
+
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()['products']
+        self.assertEqual(errors[0], {})
+        self.assertEqual(errors[2], {})
+        self.assertIn('100000', errors[1]['product'][0])
+        self.assertIn('100001', errors[3]['product'][0])
+        self.assertFalse(Order.objects.exists())
+
+
+@override_settings(GEOCODER={'BACKEND': 'places.backends.SyntheticGeocoder', 'OPTIONS': {}})
+class ProductListApiTest(TestCase):
+    def setUp(self):
+        get_geocoder.cache_clear()
+        self.addCleanup(get_geocoder.cache_clear)
+        burgers = ProductCategory.objects.create(name='Бургеры')
+        drinks = ProductCategory.objects.create(name='Напитки')
+        self.burgers = [
+            Product.objects.create(
+                name=f'Бургер {index}', price=100, image='burger.jpg', category=burgers, special_status=index == 0,
+            )
+            for index in range(3)
+        ]
+        self.drinks = [
+            Product.objects.create(name=f'Кола {index}', price=50, image='cola.jpg', category=drinks)
+            for index in range(2)
+        ]
+        hidden = Product.objects.create(name='Не в продаже', price=10, image='cola.jpg', category=drinks)
+        self.first = Restaurant.objects.create(name='Первый', address='Москва, Тверская 1')
+        self.second = Restaurant.objects.create(name='Второй', address='Москва, Тверская 2')
+        for product in self.burgers + self.drinks:
+            RestaurantMenuItem.objects.create(restaurant=self.first, product=product)
+        RestaurantMenuItem.objects.create(restaurant=self.second, product=self.drinks[0])
+        RestaurantMenuItem.objects.create(restaurant=self.second, product=hidden, availability=False)
+
+    def get_products(self, params=None, url=None, **headers):
+        return self.client.get(url or reverse('foodcartapp:product_list'), params, **headers)
+
+    def get_ids(self, params):
+        response = self.get_products(params)
+        self.assertEqual(response.status_code, 200)
+        return [product['id'] for product in response.json()['results']]
+
+    def test_pages_follow_cursor(self):
+        first_page = self.get_products({'limit': 3, 'fields': 'id'}).json()
+        second_page = self.get_products(url=first_page['next']).json()
+
+        self.assertEqual(
+            [product['id'] for product in first_page['results'] + second_page['results']],
+            [product.id for product in self.burgers + self.drinks],
+        )
+        self.assertEqual(len(first_page['results']), 3)
+        self.assertIsNone(second_page['next'])
+
+    def test_filters(self):
+        self.assertEqual(
+            self.get_ids({'category': self.drinks[0].category_id}),
+            [product.id for product in self.drinks],
+        )
+        self.assertEqual(self.get_ids({'special': 'true'}), [self.burgers[0].id])
+        self.assertEqual(self.get_ids({'restaurant': self.second.id}), [self.drinks[0].id])
+
+    def test_fields(self):
+        response = self.get_products({'fields': 'name, id', 'limit': 1})
+        self.assertEqual(response.json()['results'], [{'id': self.burgers[0].id, 'name': 'Бургер 0'}])
+
+        response = self.get_products({'fields': 'id,secret'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'fields': ['Неизвестные поля: secret']})
+
+    def test_invalid_cursor(self):
+        response = self.get_products({'cursor': '!!!'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('cursor', response.json())
+
+    def test_matching_etag_gets_not_modified(self):
+        response = self.get_products()
+        etag = response['ETag']
+
+        response = self.get_products(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        RestaurantMenuItem.objects.filter(product=self.drinks[1]).delete()
+        response = self.get_products(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
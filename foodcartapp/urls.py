@@ -1,12 +1,14 @@
 from django.urls import path
 
-from .views import product_list_api, banners_list_api, register_order
+from .views import product_list_api, product_search_api, banners_list_api, register_order, storefront_api
 
 
 app_name = "foodcartapp"
 
 urlpatterns = [
-    path('products/', product_list_api),
-    path('banners/', banners_list_api),
+    path('products/', product_list_api, name='product_list'),
+    path('products/search/', product_search_api, name='product_search'),
+    path('banners/', banners_list_api, name='banner_list'),
+    path('storefront/', storefront_api, name='storefront'),
     path('order/', register_order),
 ]
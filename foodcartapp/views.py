@@ -1,63 +1,133 @@
-from django.http import JsonResponse
-from django.templatetags.static import static
+import hashlib
+
+from django import forms
+from django.http import HttpResponse, QueryDict
+from django.shortcuts import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control, quote_etag
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
-from .models import Product
+from .banners import get_banners, get_banners_max_age
+from .catalog import PRODUCT_FIELDS, PRODUCTS_MAX_PAGE_SIZE, PRODUCTS_PAGE_SIZE, search_products, select_products
+from .fast_json import FastJsonResponse
+from .search import SEARCH_MAX_RESULTS_LIMIT, SEARCH_RESULTS_LIMIT
 from .serializers import OrderSerializer
 
 
+def respond_with_etag(request, response):
+    """Пометить ответ строгим ETag и ответить 304, если он совпал с If-None-Match."""
+    response['ETag'] = quote_etag(hashlib.sha256(response.content).hexdigest()[:32])
+    return get_conditional_response(request, etag=response['ETag'], response=response)
+
+
 def banners_list_api(request):
-    # FIXME move data to db?
-    return JsonResponse([
-        {
-            'title': 'Burger',
-            'src': static('burger.jpg'),
-            'text': 'Tasty Burger at your door step',
-        },
-        {
-            'title': 'Spices',
-            'src': static('food.jpg'),
-            'text': 'All Cuisines',
-        },
-        {
-            'title': 'New York',
-            'src': static('tasty.jpg'),
-            'text': 'Food is incomplete without a tasty dessert',
-        }
-    ], safe=False, json_dumps_params={
-        'ensure_ascii': False,
-        'indent': 4,
-    })
+    banners = get_banners()
+    response = HttpResponse(banners.content, content_type='application/json')
+    patch_cache_control(response, public=True, max_age=get_banners_max_age(banners))
+    return respond_with_etag(request, response)
+
+
+class ProductFilterForm(forms.Form):
+    category = forms.IntegerField(required=False, min_value=1)
+    special = forms.NullBooleanField(required=False)
+    restaurant = forms.IntegerField(required=False, min_value=1)
+    fields = forms.CharField(required=False)
+    limit = forms.IntegerField(required=False, min_value=1, max_value=PRODUCTS_MAX_PAGE_SIZE)
+    cursor = forms.CharField(required=False)
+
+    def clean_fields(self):
+        fields = [field.strip() for field in self.cleaned_data['fields'].split(',') if field.strip()]
+        unknown_fields = set(fields) - set(PRODUCT_FIELDS)
+        if unknown_fields:
+            raise forms.ValidationError(f'Неизвестные поля: {", ".join(sorted(unknown_fields))}')
+        return fields
+
+    def clean_cursor(self):
+        cursor = self.cleaned_data['cursor']
+        if not cursor:
+            return None
+        try:
+            return int(urlsafe_base64_decode(cursor))
+        except ValueError:
+            raise forms.ValidationError('Неверный курсор')
+
+
+class ProductSearchForm(forms.Form):
+    q = forms.CharField(max_length=100)
+    limit = forms.IntegerField(required=False, min_value=1, max_value=SEARCH_MAX_RESULTS_LIMIT)
+
+
+def get_form_errors(form):
+    return {
+        field: [error['message'] for error in errors]
+        for field, errors in form.errors.get_json_data().items()
+    }
+
+
+def get_products_page(filters, next_params):
+    products, last_id = select_products(
+        category=filters['category'],
+        special=filters['special'],
+        restaurant=filters['restaurant'],
+        after=filters['cursor'],
+        fields=filters['fields'],
+        limit=filters['limit'] or PRODUCTS_PAGE_SIZE,
+    )
+    next_url = None
+    if last_id is not None:
+        next_params['cursor'] = urlsafe_base64_encode(str(last_id).encode())
+        next_url = f'{reverse("foodcartapp:product_list")}?{next_params.urlencode()}'
+    return {'results': products, 'next': next_url}
 
 
 def product_list_api(request):
-    products = Product.objects.select_related('category').available()
-
-    dumped_products = []
-    for product in products:
-        dumped_product = {
-            'id': product.id,
-            'name': product.name,
-            'price': product.price,
-            'special_status': product.special_status,
-            'description': product.description,
-            'category': {
-                'id': product.category.id,
-                'name': product.category.name,
-            } if product.category else None,
-            'image': product.image.url,
-            'restaurant': {
-                'id': product.id,
-                'name': product.name,
-            }
-        }
-        dumped_products.append(dumped_product)
-    return JsonResponse(dumped_products, safe=False, json_dumps_params={
-        'ensure_ascii': False,
-        'indent': 4,
+    """Отдать страницу каталога с курсором следующей страницы.
+
+    Поддерживает фильтры ?category=, ?special=, ?restaurant=, выбор полей
+    ?fields=id,name,price и размер страницы ?limit=. Ответ помечается
+    строгим ETag, и повторный запрос с If-None-Match получает 304.
+    """
+    filter_form = ProductFilterForm(request.GET)
+    if not filter_form.is_valid():
+        return FastJsonResponse(get_form_errors(filter_form), status=400)
+
+    page = get_products_page(filter_form.cleaned_data, request.GET.copy())
+    return respond_with_etag(request, FastJsonResponse(page))
+
+
+def product_search_api(request):
+    """Найти товары в продаже по ?q= без учёта регистра и ё/е.
+
+    Каждое слово запроса должно начинать какое-то слово названия:
+    «чиз бек» найдёт «Чизбургер с беконом», а «бургер» — нет, потому что
+    середина слова не ищется. Размер выдачи задаёт ?limit=.
+    """
+    search_form = ProductSearchForm(request.GET)
+    if not search_form.is_valid():
+        return FastJsonResponse(get_form_errors(search_form), status=400)
+
+    products = search_products(
+        search_form.cleaned_data['q'],
+        limit=search_form.cleaned_data['limit'] or SEARCH_RESULTS_LIMIT,
+    )
+    return FastJsonResponse({'results': products})
+
+
+def storefront_api(request):
+    """Отдать всё для первого экрана витрины одним ответом: баннеры и первую страницу каталога."""
+    filter_form = ProductFilterForm({'limit': PRODUCTS_MAX_PAGE_SIZE})
+    filter_form.is_valid()
+    next_params = QueryDict(mutable=True)
+    next_params['limit'] = PRODUCTS_MAX_PAGE_SIZE
+
+    response = FastJsonResponse({
+        'banners': get_banners().items,
+        'products': get_products_page(filter_form.cleaned_data, next_params),
     })
+    patch_cache_control(response, no_cache=True)
+    return respond_with_etag(request, response)
 
 
 @api_view(['POST'])
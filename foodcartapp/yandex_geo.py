@@ -1,14 +1,46 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import requests
 from geopy import distance
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+GEOCODER_URL = "https://geocode-maps.yandex.ru/1.x"
+GEOCODER_TIMEOUT = 3
+GEOCODER_MAX_WORKERS = 8
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+
+_session = None
+_FAILED = object()
+_SKIPPED = object()
 
 
-def fetch_coordinates(apikey, address):
-    base_url = "https://geocode-maps.yandex.ru/1.x"
-    response = requests.get(base_url, params={
+def get_session():
+    global _session
+    if _session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=GEOCODER_MAX_WORKERS,
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        _session = session
+    return _session
+
+
+def fetch_coordinates(apikey, address, base_url=GEOCODER_URL, timeout=GEOCODER_TIMEOUT):
+    response = get_session().get(base_url, params={
         "geocode": address,
         "apikey": apikey,
         "format": "json",
-    })
+    }, timeout=timeout)
     response.raise_for_status()
     found_places = response.json()['response']['GeoObjectCollection']['featureMember']
 
@@ -20,9 +52,78 @@ def fetch_coordinates(apikey, address):
     return lon, lat
 
 
-def get_distance_km(first_coordinate, second_coordinate):
-    try:
-        distance_km = distance.distance(first_coordinate, second_coordinate).km
-        return distance_km
-    except ValueError:
-        return None
+def fetch_coordinates_many(apikey, addresses, base_url=GEOCODER_URL, timeout=GEOCODER_TIMEOUT,
+                           max_workers=GEOCODER_MAX_WORKERS, deadline=None):
+    """Геокодировать адреса параллельно через общий пул соединений.
+
+    Возвращает пару: словарь адрес -> (lon, lat) или None и список адресов,
+    запрос по которым завершился ошибкой. Если задан deadline, запросы,
+    которые не успели начаться за deadline секунд, не отправляются: таких
+    адресов нет ни в словаре, ни в списке ошибок.
+    """
+    addresses = list(dict.fromkeys(address for address in addresses if address))
+    if not addresses:
+        return {}, []
+    started_at = time.monotonic()
+
+    def fetch(address):
+        if deadline is not None and time.monotonic() - started_at > deadline:
+            return address, _SKIPPED
+        try:
+            return address, fetch_coordinates(apikey, address, base_url, timeout)
+        except (requests.RequestException, KeyError, ValueError):
+            logger.exception('Не удалось получить координаты адреса %s', address)
+            return address, _FAILED
+
+    workers = min(max_workers, len(addresses))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(fetch, addresses))
+    coordinates = {
+        address: found
+        for address, found in results
+        if found is not _FAILED and found is not _SKIPPED
+    }
+    failed = [address for address, found in results if found is _FAILED]
+    return coordinates, failed
+
+
+def to_radians_array(coordinates):
+    points = [(np.nan, np.nan) if point is None else point for point in coordinates]
+    return np.radians(np.array(points, dtype=float).reshape(-1, 2))
+
+
+def distance_matrix(order_coords, restaurant_coords, exact_top_k=None):
+    """Матрица расстояний в км между заказами (строки) и ресторанами (столбцы).
+
+    Расстояния считаются одним векторным проходом по формуле гаверсинусов.
+    Если задан exact_top_k, то для k ближайших ресторанов каждого заказа
+    расстояние уточняется геодезической формулой geopy. Для неизвестных
+    координат (None) в матрице стоит nan.
+    """
+    orders = to_radians_array(order_coords)
+    restaurants = to_radians_array(restaurant_coords)
+
+    order_lat = orders[:, 0, np.newaxis]
+    order_lon = orders[:, 1, np.newaxis]
+    restaurant_lat = restaurants[np.newaxis, :, 0]
+    restaurant_lon = restaurants[np.newaxis, :, 1]
+
+    haversine = (
+        np.sin((restaurant_lat - order_lat) / 2) ** 2
+        + np.cos(order_lat) * np.cos(restaurant_lat)
+        * np.sin((restaurant_lon - order_lon) / 2) ** 2
+    )
+    matrix = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(haversine))
+
+    if exact_top_k and matrix.size:
+        k = min(exact_top_k, matrix.shape[1])
+        nearest = np.argpartition(matrix, k - 1, axis=1)[:, :k]
+        for order_index, restaurant_indexes in enumerate(nearest):
+            for restaurant_index in restaurant_indexes:
+                if np.isnan(matrix[order_index, restaurant_index]):
+                    continue
+                matrix[order_index, restaurant_index] = distance.distance(
+                    order_coords[order_index],
+                    restaurant_coords[restaurant_index],
+                ).km
+    return matrix
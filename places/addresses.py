@@ -0,0 +1,71 @@
+import re
+
+ABBREVIATIONS = {
+    'ул': 'улица',
+    # «пр.» пишут и для проспекта, и для проезда, поэтому не раскрываем его.
+    'пр-т': 'проспект',
+    'пр-кт': 'проспект',
+    'просп': 'проспект',
+    'пр-д': 'проезд',
+    'пер': 'переулок',
+    'пл': 'площадь',
+    'б-р': 'бульвар',
+    'бул': 'бульвар',
+    'ш': 'шоссе',
+    'наб': 'набережная',
+    'туп': 'тупик',
+    'мкр': 'микрорайон',
+    'мкрн': 'микрорайон',
+    'р-н': 'район',
+    'обл': 'область',
+    'г': 'город',
+    'д': 'дом',
+    'к': 'корпус',
+    'корп': 'корпус',
+    'стр': 'строение',
+    'кв': 'квартира',
+}
+STREET_TYPES = {
+    'улица',
+    'проспект',
+    'проезд',
+    'переулок',
+    'площадь',
+    'бульвар',
+    'шоссе',
+    'набережная',
+    'тупик',
+    'микрорайон',
+}
+
+TOKEN_PATTERN = re.compile(r'[\w/]+(?:-[\w/]+)*')
+
+
+def clean_address(address):
+    """Убрать лишние пробелы, не меняя адрес для человека."""
+    if not address:
+        return ''
+    return ' '.join(address.split())
+
+
+def normalize_address(address):
+    """Привести адрес к ключу для кэшей геокодера и расстояний.
+
+    Регистр, пробелы, пунктуация, «ё» и сокращения вроде «ул.» или «пр-т»
+    не влияют на ключ. Типы улиц переносятся в конец, поэтому
+    «Ленина ул, 5» и «ул. Ленина 5» дают один и тот же ключ.
+    """
+    if not address:
+        return ''
+    address = address.lower().replace('ё', 'е')
+    tokens = [
+        ABBREVIATIONS.get(token, token)
+        for token in TOKEN_PATTERN.findall(address)
+    ]
+    tokens = [
+        token for index, token in enumerate(tokens)
+        if not (token == 'дом' and index + 1 < len(tokens) and tokens[index + 1][:1].isdigit())
+    ]
+    street_types = [token for token in tokens if token in STREET_TYPES]
+    tokens = [token for token in tokens if token not in STREET_TYPES]
+    return ' '.join(tokens + street_types)
@@ -0,0 +1,17 @@
+from django.contrib import admin
+
+from places.models import Place
+
+
+@admin.register(Place)
+class PlaceAdmin(admin.ModelAdmin):
+    list_display = (
+        'address',
+        'lat',
+        'lon',
+        'status',
+        'fetched_at',
+    )
+    list_filter = ('status',)
+    search_fields = ('address',)
+    readonly_fields = ('fetched_at',)
@@ -0,0 +1,124 @@
+import hashlib
+import json
+import math
+import time
+from collections import namedtuple
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from foodcartapp import yandex_geo
+from places.addresses import normalize_address
+
+
+Geocoded = namedtuple('Geocoded', ['coordinates', 'failures'])
+
+
+class BaseGeocoder:
+    def fetch_many(self, addresses, deadline=None):
+        """Вернуть Geocoded: словарь адрес -> (широта, долгота) или None и число ошибок.
+
+        Адреса, которые не удалось геокодировать из-за ошибки, в словарь
+        не попадают и учитываются в failures. Если задан deadline, адреса,
+        до которых за deadline секунд не дошла очередь, тоже пропускаются,
+        но ошибками не считаются.
+        """
+        raise NotImplementedError
+
+
+class YandexGeocoder(BaseGeocoder):
+    def __init__(self, api_key=None, url=yandex_geo.GEOCODER_URL, timeout=yandex_geo.GEOCODER_TIMEOUT,
+                 max_workers=yandex_geo.GEOCODER_MAX_WORKERS):
+        self.api_key = api_key or settings.API_KEY
+        self.url = url
+        self.timeout = timeout
+        self.max_workers = max_workers
+
+    def fetch_many(self, addresses, deadline=None):
+        fetched, failed = yandex_geo.fetch_coordinates_many(
+            self.api_key,
+            addresses,
+            base_url=self.url,
+            timeout=self.timeout,
+            max_workers=self.max_workers,
+            deadline=deadline,
+        )
+        coordinates = {}
+        for address, found in fetched.items():
+            if found:
+                lon, lat = found
+                found = float(lat), float(lon)
+            coordinates[address] = found
+        return Geocoded(coordinates, len(failed))
+
+
+class FixtureGeocoder(BaseGeocoder):
+    """Геокодер без сети, который читает координаты из JSON-файла.
+
+    Файл — словарь адрес -> [широта, долгота] или null. Такой файл
+    выгружает команда export_places. Неизвестные адреса считаются ненайденными.
+    """
+
+    def __init__(self, path):
+        with open(path, encoding='utf-8') as file:
+            fixtures = json.load(file)
+        self.coordinates = {
+            normalize_address(address): tuple(coordinates) if coordinates else None
+            for address, coordinates in fixtures.items()
+        }
+
+    def fetch_many(self, addresses, deadline=None):
+        return Geocoded({
+            address: self.coordinates.get(normalize_address(address))
+            for address in addresses
+        }, 0)
+
+
+class SyntheticGeocoder(BaseGeocoder):
+    """Детерминированный геокодер для нагрузочных тестов.
+
+    Координаты получаются из хэша адреса и лежат в радиусе radius_km
+    от center. latency — задержка одного запроса в секундах, запросы
+    «выполняются» по max_workers штук параллельно, как у YandexGeocoder.
+    """
+
+    def __init__(self, center=(55.751244, 37.618423), radius_km=20, latency=0,
+                 max_workers=yandex_geo.GEOCODER_MAX_WORKERS, not_found_ratio=0):
+        self.center = center
+        self.radius_km = radius_km
+        self.latency = latency
+        self.max_workers = max_workers
+        self.not_found_ratio = not_found_ratio
+
+    def locate(self, address):
+        digest = hashlib.sha256(normalize_address(address).encode('utf-8')).digest()
+        angle, distance, found = (
+            int.from_bytes(digest[offset:offset + 4], 'big') / 2 ** 32
+            for offset in (0, 4, 8)
+        )
+        if found < self.not_found_ratio:
+            return None
+        lat, lon = self.center
+        distance_km = self.radius_km * math.sqrt(distance)
+        lat_shift = distance_km * math.cos(2 * math.pi * angle) / yandex_geo.KM_PER_DEGREE
+        lon_shift = distance_km * math.sin(2 * math.pi * angle) / (
+            yandex_geo.KM_PER_DEGREE * math.cos(math.radians(lat))
+        )
+        return lat + lat_shift, lon + lon_shift
+
+    def fetch_many(self, addresses, deadline=None):
+        addresses = list(dict.fromkeys(addresses))
+        if deadline is not None and self.latency:
+            # Как у YandexGeocoder: после deadline новые запросы не начинаются.
+            rounds = math.floor(deadline / self.latency) + 1
+            addresses = addresses[:rounds * self.max_workers]
+        if addresses and self.latency:
+            time.sleep(self.latency * math.ceil(len(addresses) / self.max_workers))
+        return Geocoded({address: self.locate(address) for address in addresses}, 0)
+
+
+@lru_cache(maxsize=None)
+def get_geocoder():
+    backend = import_string(settings.GEOCODER['BACKEND'])
+    return backend(**settings.GEOCODER.get('OPTIONS', {}))
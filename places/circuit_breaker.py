@@ -0,0 +1,31 @@
+from django.core.cache import cache
+
+
+class CircuitBreaker:
+    """Предохранитель для внешнего сервиса с общим для всех процессов состоянием.
+
+    После failure_threshold ошибок подряд предохранитель размыкается
+    на cooldown секунд, и обращения к сервису в это время не выполняются.
+    """
+
+    def __init__(self, name, failure_threshold, cooldown):
+        self.failures_key = f'{name}_failures'
+        self.open_key = f'{name}_open'
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+
+    def is_open(self):
+        return cache.get(self.open_key) is not None
+
+    def record_success(self):
+        cache.delete(self.failures_key)
+
+    def record_failure(self, count=1):
+        try:
+            failures = cache.incr(self.failures_key, count)
+        except ValueError:
+            failures = count
+            cache.set(self.failures_key, failures, timeout=self.cooldown)
+        if failures >= self.failure_threshold:
+            cache.set(self.open_key, True, timeout=self.cooldown)
+            cache.delete(self.failures_key)
@@ -0,0 +1,151 @@
+from collections import OrderedDict
+from datetime import timedelta
+from threading import Lock
+
+from django.utils import timezone
+
+from places.addresses import normalize_address
+from places.backends import get_geocoder
+from places.circuit_breaker import CircuitBreaker
+from places.models import Place
+from places.stats import record_lookups
+
+LRU_CACHE_SIZE = 4096
+NOT_FOUND_TTL = timedelta(days=7)
+FAILURE_THRESHOLD = 5
+COOLDOWN_SECONDS = 60
+REQUEST_DEADLINE = 5
+
+_MISSING = object()
+
+
+class LRUCache:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, default=_MISSING):
+        with self._lock:
+            try:
+                self._items.move_to_end(key)
+            except KeyError:
+                return default
+            return self._items[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            if len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+coordinates_cache = LRUCache(LRU_CACHE_SIZE)
+geocoder_breaker = CircuitBreaker('geocoder', FAILURE_THRESHOLD, COOLDOWN_SECONDS)
+
+
+def build_place(key, coordinates):
+    if coordinates:
+        lat, lon = coordinates
+        return Place(address=key, lat=lat, lon=lon, status=Place.StatusChoices.FOUND)
+    return Place(address=key, status=Place.StatusChoices.NOT_FOUND)
+
+
+def get_expiry(place):
+    if place.status == Place.StatusChoices.FOUND:
+        return None
+    return place.fetched_at + NOT_FOUND_TTL
+
+
+def is_expired(expires_at, now):
+    return expires_at is not None and expires_at <= now
+
+
+def get_coordinates_many(addresses, deadline=REQUEST_DEADLINE):
+    """Вернуть словарь адрес -> (широта, долгота) или None для набора адресов.
+
+    Кэш процесса и таблица Place проверяются одним запросом на весь набор,
+    а все настоящие промахи уходят в геокодер одной параллельной пачкой.
+    Ненайденные адреса запоминаются на NOT_FOUND_TTL. Адреса, которые
+    не удалось геокодировать из-за ошибки или разомкнутого предохранителя,
+    в ответ не попадают.
+
+    deadline ограничивает ожидание геокодера, чтобы не задерживать запрос
+    пользователя: адреса, до которых не дошла очередь, тоже пропускаются.
+    Фоновые задачи передают deadline=None и ждут всю пачку. Предохранитель
+    считает только ошибки запросов, а не пропуски по deadline.
+    """
+    now = timezone.now()
+    keys = {}
+    for address in addresses:
+        key = normalize_address(address)
+        if key:
+            keys.setdefault(key, []).append(address)
+
+    found = {}
+    for key in list(keys):
+        cached = coordinates_cache.get(key)
+        if cached is not _MISSING and not is_expired(cached[1], now):
+            found[key] = cached[0]
+
+    memory_hits = len(found)
+
+    stale_places = {}
+    unresolved = [key for key in keys if key not in found]
+    if unresolved:
+        for place in Place.objects.filter(address__in=unresolved):
+            expires_at = get_expiry(place)
+            if is_expired(expires_at, now):
+                stale_places[place.address] = place
+                continue
+            found[place.address] = place.coordinates
+            coordinates_cache.set(place.address, (place.coordinates, expires_at))
+
+    misses = {keys[key][0]: key for key in keys if key not in found}
+    record_lookups(
+        memory_hits=memory_hits,
+        db_hits=len(found) - memory_hits,
+        misses=len(misses),
+    )
+    if misses and not geocoder_breaker.is_open():
+        fetched, failures = get_geocoder().fetch_many(misses, deadline=deadline)
+        if failures:
+            geocoder_breaker.record_failure(failures)
+        elif fetched:
+            geocoder_breaker.record_success()
+
+        new_places = []
+        updated_places = []
+        for address, coordinates in fetched.items():
+            key = misses[address]
+            found[key] = coordinates
+            place = build_place(key, coordinates)
+            place.fetched_at = now
+            coordinates_cache.set(key, (coordinates, get_expiry(place)))
+            if key in stale_places:
+                place.pk = stale_places[key].pk
+                updated_places.append(place)
+            else:
+                new_places.append(place)
+        Place.objects.bulk_create(new_places, ignore_conflicts=True)
+        Place.objects.bulk_update(updated_places, ['lat', 'lon', 'status', 'fetched_at'])
+
+    return {
+        address: found[key]
+        for key, key_addresses in keys.items() if key in found
+        for address in key_addresses
+    }
+
+
+def get_coordinates(address, deadline=REQUEST_DEADLINE):
+    """Вернуть (широта, долгота) адреса или None, если геокодер его не нашёл.
+
+    Сначала смотрим в LRU-кэш процесса, затем в таблицу Place,
+    и только при настоящем промахе идём в геокодер.
+    """
+    return get_coordinates_many([address], deadline=deadline).get(address)
@@ -0,0 +1,21 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from places.models import Place
+
+
+class Command(BaseCommand):
+    help = 'Export geocoded places as a fixture for places.backends.FixtureGeocoder'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+
+    def handle(self, *args, **options):
+        fixtures = {
+            place.address: list(place.coordinates) if place.coordinates else None
+            for place in Place.objects.order_by('address')
+        }
+        with open(options['path'], 'w', encoding='utf-8') as file:
+            json.dump(fixtures, file, ensure_ascii=False, indent=4)
+        self.stdout.write(self.style.SUCCESS(f'Exported {len(fixtures)} places'))
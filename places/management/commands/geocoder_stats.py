@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from places.stats import get_lookup_stats, reset_lookup_stats
+
+
+class Command(BaseCommand):
+    help = 'Show geocoder cache hit and miss rates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after printing them')
+
+    def handle(self, *args, **options):
+        stats = get_lookup_stats()
+        self.stdout.write(f"Lookups: {stats['total']}")
+        self.stdout.write(f"Memory cache hits: {stats['memory_hits']}")
+        self.stdout.write(f"Database hits: {stats['db_hits']}")
+        self.stdout.write(f"Geocoder requests: {stats['misses']}")
+        if stats['hit_rate'] is not None:
+            self.stdout.write(f"Hit rate: {stats['hit_rate']:.1%}")
+        if options['reset']:
+            reset_lookup_stats()
+            self.stdout.write(self.style.SUCCESS('Counters reset'))
@@ -0,0 +1,30 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:31
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Place',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('address', models.CharField(max_length=100, unique=True, verbose_name='Адрес')),
+                ('lat', models.FloatField(blank=True, null=True, verbose_name='Широта')),
+                ('lon', models.FloatField(blank=True, null=True, verbose_name='Долгота')),
+                ('status', models.CharField(choices=[('Found', 'Найден'), ('NotFound', 'Не найден')], db_index=True, default='Found', max_length=10, verbose_name='Статус')),
+                ('fetched_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Время запроса к геокодеру')),
+            ],
+            options={
+                'verbose_name': 'Место',
+                'verbose_name_plural': 'Места',
+            },
+        ),
+    ]
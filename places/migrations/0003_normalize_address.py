@@ -0,0 +1,36 @@
+from collections import defaultdict
+
+from django.db import migrations
+
+from places.addresses import normalize_address
+
+
+def merge_places(apps, schema_editor):
+    Place = apps.get_model('places', 'Place')
+
+    groups = defaultdict(list)
+    for place in Place.objects.order_by('-fetched_at').iterator():
+        groups[normalize_address(place.address)].append(place)
+
+    for key, places in groups.items():
+        if not key:
+            Place.objects.filter(pk__in=[place.pk for place in places]).delete()
+            continue
+        places.sort(key=lambda place: place.status != 'Found')
+        kept, duplicates = places[0], places[1:]
+        if duplicates:
+            Place.objects.filter(pk__in=[place.pk for place in duplicates]).delete()
+        if kept.address != key:
+            kept.address = key
+            kept.save(update_fields=['address'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0002_alter_place_address'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_places, migrations.RunPython.noop),
+    ]
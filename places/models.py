@@ -0,0 +1,49 @@
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class Place(models.Model):
+    class StatusChoices(models.TextChoices):
+        FOUND = 'Found', _('Найден')
+        NOT_FOUND = 'NotFound', _('Не найден')
+
+    address = models.CharField(
+        verbose_name='Адрес',
+        max_length=200,
+        unique=True
+    )
+    lat = models.FloatField(
+        null=True,
+        blank=True,
+        verbose_name='Широта'
+    )
+    lon = models.FloatField(
+        null=True,
+        blank=True,
+        verbose_name='Долгота'
+    )
+    status = models.CharField(
+        choices=StatusChoices.choices,
+        default=StatusChoices.FOUND,
+        max_length=10,
+        db_index=True,
+        verbose_name='Статус'
+    )
+    fetched_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Время запроса к геокодеру'
+    )
+
+    class Meta:
+        verbose_name = 'Место'
+        verbose_name_plural = 'Места'
+
+    def __str__(self):
+        return self.address
+
+    @property
+    def coordinates(self):
+        if self.status != self.StatusChoices.FOUND:
+            return None
+        return self.lat, self.lon
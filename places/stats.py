@@ -0,0 +1,59 @@
+import time
+from collections import Counter
+from threading import Lock
+
+from django.core.cache import cache
+
+STATS_NAMES = ('memory_hits', 'db_hits', 'misses')
+STATS_FLUSH_INTERVAL = 10
+
+_pending = Counter()
+_pending_lock = Lock()
+_last_flush = time.monotonic()
+
+
+def stats_key(name):
+    return f'geocoder_stats_{name}'
+
+
+def record_lookups(**counts):
+    """Учесть обращения к геокодеру.
+
+    Счётчики копятся в памяти процесса и складываются в общий кэш не чаще
+    раза в STATS_FLUSH_INTERVAL секунд: запись в кэш в базе стоит нескольких
+    запросов, а поиск координат идёт на каждой странице заказов.
+    """
+    global _last_flush
+    with _pending_lock:
+        _pending.update({name: count for name, count in counts.items() if count})
+        if time.monotonic() - _last_flush < STATS_FLUSH_INTERVAL:
+            return
+        _last_flush = time.monotonic()
+    flush_lookup_stats()
+
+
+def flush_lookup_stats():
+    with _pending_lock:
+        pending = dict(_pending)
+        _pending.clear()
+    for name, count in pending.items():
+        try:
+            cache.incr(stats_key(name), count)
+        except ValueError:
+            cache.set(stats_key(name), count, timeout=None)
+
+
+def get_lookup_stats():
+    flush_lookup_stats()
+    values = cache.get_many([stats_key(name) for name in STATS_NAMES])
+    stats = {name: values.get(stats_key(name), 0) for name in STATS_NAMES}
+    total = sum(stats.values())
+    stats['total'] = total
+    stats['hit_rate'] = (stats['memory_hits'] + stats['db_hits']) / total if total else None
+    return stats
+
+
+def reset_lookup_stats():
+    with _pending_lock:
+        _pending.clear()
+    cache.delete_many([stats_key(name) for name in STATS_NAMES])
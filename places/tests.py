@@ -0,0 +1,79 @@
+from importlib import import_module
+
+from django.apps import apps
+from django.test import SimpleTestCase, TestCase
+
+from distances.models import Distance
+from foodcartapp.models import Restaurant
+from places.addresses import normalize_address
+from places.models import Place
+
+
+class NormalizeAddressTest(SimpleTestCase):
+    def assert_same_key(self, *addresses):
+        keys = {normalize_address(address) for address in addresses}
+        self.assertEqual(len(keys), 1, keys)
+
+    def test_whitespace(self):
+        self.assert_same_key('Москва, Тверская 1', '  Москва,   Тверская\t1 ')
+
+    def test_case(self):
+        self.assert_same_key('Москва, Тверская 1', 'МОСКВА, тверская 1')
+
+    def test_punctuation(self):
+        self.assert_same_key('Москва, Тверская, 1', 'Москва Тверская 1', 'Москва; Тверская 1.')
+
+    def test_street_type_abbreviation_and_order(self):
+        self.assert_same_key('ул. Ленина, 5', 'ул Ленина 5', 'Ленина ул, 5', 'улица Ленина, д. 5')
+
+    def test_yo(self):
+        self.assert_same_key('Москва, Семёновская 3', 'Москва, Семеновская 3')
+
+    def test_different_houses_differ(self):
+        self.assertNotEqual(normalize_address('Ленина 5'), normalize_address('Ленина 5 корп. 2'))
+
+    def test_ambiguous_pr_is_not_expanded(self):
+        self.assertEqual(normalize_address('пр-т Мира 1'), normalize_address('проспект Мира 1'))
+        self.assertEqual(normalize_address('пр-д Мира 1'), normalize_address('проезд Мира 1'))
+        self.assertNotEqual(normalize_address('пр. Мира 1'), normalize_address('проспект Мира 1'))
+        self.assertNotEqual(normalize_address('пр. Мира 1'), normalize_address('проезд Мира 1'))
+
+    def test_empty(self):
+        self.assertEqual(normalize_address(''), '')
+        self.assertEqual(normalize_address(None), '')
+
+
+class NormalizeAddressMigrationsTest(TestCase):
+    def test_merge_places_keeps_found_place(self):
+        merge_places = import_module('places.migrations.0003_normalize_address').merge_places
+        Place.objects.create(address='ул. Ленина, 5', status=Place.StatusChoices.NOT_FOUND)
+        found = Place.objects.create(address='Ленина ул 5', lat=55.7, lon=37.6)
+        other = Place.objects.create(address='Тверская 1', lat=55.8, lon=37.5)
+        Place.objects.create(address=' , ')
+
+        merge_places(apps, None)
+
+        self.assertEqual(
+            set(Place.objects.values_list('id', 'address')),
+            {(found.id, normalize_address('Ленина 5 ул')), (other.id, normalize_address('Тверская 1'))},
+        )
+
+    def test_merge_distances_keeps_known_distance(self):
+        merge_distances = import_module('distances.migrations.0005_normalize_order_address').merge_distances
+        # bulk_create не вызывает save(), поэтому рестораны не геокодируются.
+        Restaurant.objects.bulk_create([
+            Restaurant(name='Первый', address='Москва, Тверская 1'),
+            Restaurant(name='Второй', address='Москва, Тверская 2'),
+        ])
+        first, second = Restaurant.objects.order_by('id')
+        known = Distance.objects.create(restaurant=first, order_address='ул. Ленина, 5', distance=1.5)
+        Distance.objects.create(restaurant=first, order_address='Ленина ул 5', distance=None)
+        other_restaurant = Distance.objects.create(restaurant=second, order_address='Ленина ул 5', distance=2.5)
+
+        merge_distances(apps, None)
+
+        key = normalize_address('ул. Ленина, 5')
+        self.assertEqual(
+            set(Distance.objects.values_list('id', 'restaurant_id', 'order_address', 'distance')),
+            {(known.id, first.id, key, 1.5), (other_restaurant.id, second.id, key, 2.5)},
+        )
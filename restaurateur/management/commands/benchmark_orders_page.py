@@ -0,0 +1,108 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from foodcartapp.eligibility import refresh_order_eligibility
+from foodcartapp.models import Order, OrderProduct, Product, ProductCategory, Restaurant, RestaurantMenuItem
+from places.backends import get_geocoder
+from restaurateur.views import view_order_candidates, view_orders
+
+SYNTHETIC_GEOCODER = {'BACKEND': 'places.backends.SyntheticGeocoder', 'OPTIONS': {}}
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the manager orders page and its candidates endpoint on synthetic open orders. '
+        'The data is created in a transaction and rolled back; addresses go to SyntheticGeocoder.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, nargs='+', default=[500, 5000])
+        parser.add_argument('--restaurants', type=int, default=50)
+        parser.add_argument('--products', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        get_geocoder.cache_clear()
+        try:
+            with override_settings(GEOCODER=SYNTHETIC_GEOCODER), transaction.atomic():
+                products = self.create_menus(options['restaurants'], options['products'])
+                created = 0
+                for orders_count in sorted(options['orders']):
+                    self.create_orders(products, orders_count - created)
+                    created = orders_count
+                    self.report(orders_count, options['repeat'])
+                transaction.set_rollback(True)
+        finally:
+            get_geocoder.cache_clear()
+
+    def create_menus(self, restaurants_count, products_count):
+        random.seed(0)
+        category = ProductCategory.objects.create(name='benchmark')
+        products = [
+            Product.objects.create(name=f'benchmark {index}', price=100 + index, image='benchmark.jpg', category=category)
+            for index in range(products_count)
+        ]
+        for index in range(restaurants_count):
+            restaurant = Restaurant.objects.create(name=f'benchmark {index}', address=f'Москва, Тверская {index}')
+            RestaurantMenuItem.objects.bulk_create(
+                RestaurantMenuItem(restaurant=restaurant, product=product)
+                for product in products
+                if random.random() < 0.8
+            )
+        return products
+
+    def create_orders(self, products, count):
+        Order.objects.bulk_create(
+            Order(
+                client_name='Иван',
+                client_lastname='Петров',
+                phone='+79991234567',
+                address=f'Москва, Арбат {random.randrange(10_000)}',
+            )
+            for _ in range(count)
+        )
+        # bulk_create возвращает id не во всех СУБД, поэтому перечитываем заказы.
+        orders = list(Order.objects.order_by('-id')[:count])
+        OrderProduct.objects.bulk_create(
+            OrderProduct(order=order, product=product, quantity=1, price=product.price)
+            for order in orders
+            for product in random.sample(products, 3)
+        )
+        for order in orders:
+            order.update_total()
+        refresh_order_eligibility(orders)
+
+    def report(self, orders_count, repeat):
+        request_factory = RequestFactory()
+        manager = User(username='benchmark', is_staff=True)
+
+        def get(view, path, params=None):
+            request = request_factory.get(path, params)
+            request.user = manager
+            return view(request)
+
+        get(view_orders, '/manager/orders/')
+        page_ids = ','.join(
+            str(order_id)
+            for order_id in Order.objects.order_by('-created_at', '-id').values_list('id', flat=True)[:50]
+        )
+        get(view_order_candidates, '/manager/orders/candidates/', {'ids': page_ids})
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{orders_count} open orders'))
+        for name, view, path, params in [
+            ('orders page', view_orders, '/manager/orders/', None),
+            ('candidates for the page', view_order_candidates, '/manager/orders/candidates/', {'ids': page_ids}),
+        ]:
+            timings = []
+            for _ in range(repeat):
+                with CaptureQueriesContext(connection) as queries:
+                    started_at = time.perf_counter()
+                    get(view, path, params)
+                    timings.append(time.perf_counter() - started_at)
+            self.stdout.write(f'{name:<26} {len(queries.captured_queries):>3} queries {min(timings) * 1000:>8.1f} ms')
@@ -1,3 +1,193 @@
-from django.test import TestCase
+from datetime import date, datetime, timedelta, timezone
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.http import urlsafe_base64_encode
+
+from foodcartapp.models import Order, Product, ProductCategory, Restaurant, RestaurantMenuItem
+from foodcartapp.serializers import OrderSerializer
+from places.backends import get_geocoder
+from places.geocoder import coordinates_cache
+from restaurateur.views import OrderFilterForm
+
+RESTAURANTS_COUNT = 8
+
+
+def create_menu():
+    category = ProductCategory.objects.create(name='Бургеры')
+    products = [
+        Product.objects.create(name=f'Бургер {index}', price=100 + index, image='burger.jpg', category=category)
+        for index in range(4)
+    ]
+    for index in range(RESTAURANTS_COUNT):
+        restaurant = Restaurant.objects.create(name=f'Ресторан {index}', address=f'Москва, Тверская {index}')
+        for product in products[:4 - index % 2]:
+            RestaurantMenuItem.objects.create(restaurant=restaurant, product=product)
+    return products
+
+
+def create_orders(products, count):
+    orders = []
+    for index in range(count):
+        serializer = OrderSerializer(data={
+            'firstname': 'Иван',
+            'lastname': 'Петров',
+            'phonenumber': '+79991234567',
+            'address': f'Москва, Арбат {index}',
+            'products': [
+                {'product': product.id, 'quantity': 1}
+                for product in products[:index % len(products) + 1]
+            ],
+        })
+        serializer.is_valid(raise_exception=True)
+        orders.append(serializer.save())
+    return orders
+
+
+SYNTHETIC_GEOCODER = {'BACKEND': 'places.backends.SyntheticGeocoder', 'OPTIONS': {}}
+
+
+@override_settings(GEOCODER=SYNTHETIC_GEOCODER)
+class OrdersPageQueriesTest(TestCase):
+    """Число запросов страницы заказов и кандидатов не зависит от числа заказов."""
+
+    def setUp(self):
+        get_geocoder.cache_clear()
+        self.addCleanup(get_geocoder.cache_clear)
+        coordinates_cache.clear()
+        # Счётчики геокодера сбрасываются в кэш по таймеру, в подсчёт запросов это попадать не должно.
+        stats_patcher = mock.patch('places.stats.STATS_FLUSH_INTERVAL', float('inf'))
+        stats_patcher.start()
+        self.addCleanup(stats_patcher.stop)
+        self.products = create_menu()
+        manager = User.objects.create_user('manager', password='password', is_staff=True)
+        self.client.force_login(manager)
+
+    def get_orders_page(self):
+        response = self.client.get(reverse('restaurateur:view_orders'))
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def get_candidates(self, orders):
+        response = self.client.get(
+            reverse('restaurateur:view_order_candidates'),
+            {'ids': ','.join(str(order.id) for order in orders)},
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()['candidates']
+
+    def assert_orders_page_queries(self, orders_count):
+        create_orders(self.products, orders_count)
+        self.get_orders_page()
+
+        # сессия, пользователь, страница заказов, рестораны для фильтра
+        with self.assertNumQueries(4):
+            response = self.get_orders_page()
+        self.assertContains(response, '<tr data-order-id=', count=Order.objects.count())
+
+    def test_orders_page_with_few_orders(self):
+        self.assert_orders_page_queries(5)
+
+    def test_orders_page_with_many_orders(self):
+        self.assert_orders_page_queries(40)
+
+    def assert_candidates_queries(self, orders_count, cold_queries):
+        orders = create_orders(self.products, orders_count)
+
+        # Первый запрос геокодирует адреса, перестраивает индекс ресторанов
+        # и сохраняет недостающие расстояния одним bulk_create.
+        with self.assertNumQueries(cold_queries):
+            candidates = self.get_candidates(orders)
+        self.assertEqual(len(candidates), orders_count)
+        self.assertTrue(all(candidates.values()))
+
+        # сессия, пользователь, заказы, подходящие рестораны, версия индекса ресторанов,
+        # рестораны-кандидаты, расстояния; координаты адресов уже в кэше процесса
+        with self.assertNumQueries(7):
+            self.assertEqual(self.get_candidates(orders), candidates)
+
+    def test_order_candidates_for_few_orders(self):
+        self.assert_candidates_queries(5, cold_queries=14)
+
+    def test_order_candidates_for_many_orders(self):
+        # 320 расстояний SQLite вставляет двумя INSERT: не больше 999 параметров на запрос.
+        self.assert_candidates_queries(40, cold_queries=15)
+
+
+@override_settings(GEOCODER=SYNTHETIC_GEOCODER)
+class OrderFilterFormTest(TestCase):
+    def setUp(self):
+        get_geocoder.cache_clear()
+        self.addCleanup(get_geocoder.cache_clear)
+
+    def test_created_dates_include_whole_days(self):
+        orders = create_orders(create_menu(), 4)
+        created_at = [
+            datetime(2024, 1, 9, 23, 59, 59, tzinfo=timezone.utc),
+            datetime(2024, 1, 10, 0, 0, tzinfo=timezone.utc),
+            datetime(2024, 1, 11, 23, 59, 59, tzinfo=timezone.utc),
+            datetime(2024, 1, 12, 0, 0, tzinfo=timezone.utc),
+        ]
+        for order, moment in zip(orders, created_at):
+            Order.objects.filter(id=order.id).update(created_at=moment)
+
+        form = OrderFilterForm({'created_from': date(2024, 1, 10), 'created_to': date(2024, 1, 11)})
+        self.assertTrue(form.is_valid())
+
+        self.assertQuerysetEqual(
+            form.filter(Order.objects.order_by('created_at')),
+            [orders[1].id, orders[2].id],
+            transform=lambda order: order.id,
+        )
+
+
+@override_settings(GEOCODER=SYNTHETIC_GEOCODER)
+class OrderChangesTest(TestCase):
+    def setUp(self):
+        get_geocoder.cache_clear()
+        self.addCleanup(get_geocoder.cache_clear)
+        self.products = create_menu()
+        manager = User.objects.create_user('manager', password='password', is_staff=True)
+        self.client.force_login(manager)
+
+    def poll(self, cursor=''):
+        response = self.client.get(reverse('restaurateur:view_order_changes'), {'since': cursor})
+        self.assertEqual(response.status_code, 200)
+        changes = response.json()
+        return changes['cursor'], [order['id'] for order in changes['orders']]
+
+    def test_late_commit_behind_cursor_is_returned(self):
+        first_order, = create_orders(self.products, 1)
+        cursor, _ = self.poll()
+        cursor, order_ids = self.poll(cursor)
+        self.assertEqual(order_ids, [first_order.id])
+
+        # Заказ сохранён раньше first_order, но его транзакция зафиксировалась
+        # только после опроса.
+        late_order, = create_orders(self.products, 1)
+        Order.objects.filter(id=late_order.id).update(updated_at=first_order.updated_at - timedelta(seconds=1))
+        _, order_ids = self.poll(cursor)
+
+        self.assertIn(late_order.id, order_ids)
+
+    def test_naive_cursor_is_treated_as_missing(self):
+        create_orders(self.products, 1)
+        naive_cursor = urlsafe_base64_encode(b'2024-01-01T00:00:00|0')
+
+        cursor, order_ids = self.poll(naive_cursor)
+
+        self.assertEqual(order_ids, [])
+        self.assertNotEqual(cursor, naive_cursor)
+        response = self.client.get(reverse('restaurateur:view_orders'), {'cursor': naive_cursor})
+        self.assertEqual(response.status_code, 200)
+
+    def test_settled_changes_are_not_returned_again(self):
+        order, = create_orders(self.products, 1)
+        Order.objects.filter(id=order.id).update(updated_at=datetime.now(timezone.utc) - timedelta(hours=1))
+
+        cursor, _ = self.poll()
+        cursor, order_ids = self.poll(cursor)
+        self.assertEqual(order_ids, [])
+        self.assertEqual(self.poll(cursor)[1], [])
@@ -1,17 +1,31 @@
-from collections import defaultdict
+from datetime import datetime, timedelta
 
 from django import forms
 from django.contrib.auth import authenticate, login
 from django.contrib.auth import views as auth_views
 from django.contrib.auth.decorators import user_passes_test
+from django.db.models import Q
+from django.http import JsonResponse
 from django.shortcuts import redirect, render
-from django.urls import reverse_lazy
+from django.template.loader import render_to_string
+from django.urls import reverse, reverse_lazy
+from django.utils import timezone
+from django.utils.http import url_has_allowed_host_and_scheme, urlsafe_base64_decode, urlsafe_base64_encode
 from django.views import View
 
-from distances.models import Distance
-from foodcartapp.models import Product, Restaurant, Order, RestaurantMenuItem
-from foodcartapp.yandex_geo import fetch_coordinates, get_distance_km
-from star_burger.settings import API_KEY
+from distances.calculator import (
+    calculate_distances,
+    find_missing_pairs,
+    find_nearest_restaurants,
+    load_distances,
+)
+from foodcartapp.eligibility import load_eligible_restaurants
+from foodcartapp.models import Product, Restaurant, Order
+from places.addresses import normalize_address
+
+ORDERS_PAGE_SIZE = 50
+ORDER_CHANGES_LIMIT = 100
+ORDER_CHANGES_WINDOW = timedelta(seconds=30)
 
 
 class Login(forms.Form):
@@ -31,6 +45,55 @@ class Login(forms.Form):
     )
 
 
+def start_of_day(date):
+    """Начало суток date в текущем часовом поясе."""
+    return timezone.make_aware(datetime.combine(date, datetime.min.time()))
+
+
+class OrderFilterForm(forms.Form):
+    status = forms.ChoiceField(
+        label='Статус', required=False,
+        choices=[('', 'Все необработанные')] + Order.StatusChoices.choices,
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+    payment_method = forms.ChoiceField(
+        label='Способ оплаты', required=False,
+        choices=[('', 'Любой')] + Order.PaymentChoices.choices,
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+    restaurant = forms.ModelChoiceField(
+        label='Ресторан', required=False,
+        queryset=Restaurant.objects.order_by('name'),
+        empty_label='Любой',
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+    created_from = forms.DateField(
+        label='Создан с', required=False,
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'})
+    )
+    created_to = forms.DateField(
+        label='Создан по', required=False,
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'})
+    )
+
+    def filter(self, orders):
+        filters = self.cleaned_data
+        if filters['status']:
+            orders = orders.filter(status=filters['status'])
+        else:
+            orders = orders.exclude(status=Order.StatusChoices.DELIVERED)
+        if filters['payment_method']:
+            orders = orders.filter(payment_method=filters['payment_method'])
+        if filters['restaurant']:
+            orders = orders.filter(restaurant=filters['restaurant'])
+        # Границы суток, а не created_at__date: приведение к дате не даёт использовать индекс.
+        if filters['created_from']:
+            orders = orders.filter(created_at__gte=start_of_day(filters['created_from']))
+        if filters['created_to']:
+            orders = orders.filter(created_at__lt=start_of_day(filters['created_to'] + timedelta(days=1)))
+        return orders
+
+
 class LoginView(View):
     def get(self, request, *args, **kwargs):
         form = Login()
@@ -93,63 +156,215 @@ def view_restaurants(request):
     })
 
 
-@user_passes_test(is_manager, login_url='restaurateur:login')
-def view_orders(request):
-    orders = Order.objects.order_price().prefetch_related(
-        'products'
-    ).exclude(
-        status=Order.StatusChoices.DELIVERED,
-    )
+def encode_cursor(moment, order_id):
+    cursor = f'{moment.isoformat()}|{order_id}'
+    return urlsafe_base64_encode(cursor.encode())
 
-    menu_items = RestaurantMenuItem.objects.prefetch_related(
-        'restaurant'
-    ).filter(
-        availability=True
-    )
 
-    restaurant_products = defaultdict(set)
-    for item in menu_items:
-        restaurant_products[item.restaurant].add(item.product_id)
+def decode_cursor(cursor):
+    """Вернуть позицию (момент, id) из курсора или None, если курсор испорчен.
 
-    restaurants = Restaurant.objects.prefetch_related(
-        'menu_items',
-        'menu_items__product',
-        'distances'
-    )
+    Курсоры выдаёт сервер, и момент в них всегда с часовым поясом.
+    Момент без пояса не с чем сравнивать, такой курсор считается испорченным.
+    """
+    try:
+        created_at, order_id = urlsafe_base64_decode(cursor).decode().split('|')
+        created_at = datetime.fromisoformat(created_at)
+        order_id = int(order_id)
+    except ValueError:
+        return None
+    if timezone.is_naive(created_at):
+        return None
+    return created_at, order_id
+
+
+def paginate_orders(orders, cursor, page_size=ORDERS_PAGE_SIZE):
+    """Вернуть страницу заказов после курсора и курсор следующей страницы.
+
+    Заказы упорядочены как в Order.Meta.ordering, по убыванию (created_at, id),
+    поэтому страница выбирается по индексу без OFFSET.
+    """
+    orders = orders.order_by('-created_at', '-id')
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        created_at, order_id = position
+        orders = orders.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=order_id)
+        )
+    orders = list(orders[:page_size + 1])
+    next_cursor = None
+    if len(orders) > page_size:
+        last_order = orders[page_size - 1]
+        next_cursor = encode_cursor(last_order.created_at, last_order.id)
+    return orders[:page_size], next_cursor
+
+
+def parse_order_ids(value, limit=ORDERS_PAGE_SIZE):
+    order_ids = []
+    for order_id in value.split(','):
+        order_id = order_id.strip()
+        if order_id.isdigit():
+            order_ids.append(int(order_id))
+    return order_ids[:limit]
 
+
+def find_order_candidates(orders):
+    """Вернуть словарь id заказа -> ближайшие подходящие рестораны с расстояниями.
+
+    Рестораны отсортированы по расстоянию, неизвестные расстояния идут последними.
+    """
+    eligible_restaurants = load_eligible_restaurants(orders)
+
+    nearest_restaurants = find_nearest_restaurants(orders, eligible_restaurants)
+    candidate_restaurants = Restaurant.objects.in_bulk({
+        restaurant_id
+        for restaurant_ids in nearest_restaurants.values()
+        for restaurant_id in restaurant_ids
+    })
+
+    distances = load_distances(orders, candidate_restaurants)
+    missing_pairs = find_missing_pairs(orders, nearest_restaurants, candidate_restaurants, distances)
+    distances.update(calculate_distances(missing_pairs))
+
+    order_candidates = {}
     for order in orders:
-        order_products_ids = set(order.products.values_list('product_id', flat=True))
-        available_restaurants = []
-        order.products.select_related('product').filter(
-            product__menu_items__product_id__in=order_products_ids,
+        address_key = normalize_address(order.address)
+        candidates = [
+            {
+                'name': candidate_restaurants[restaurant_id].name,
+                'distance': distances.get((restaurant_id, address_key)),
+            }
+            for restaurant_id in nearest_restaurants[order.id]
+        ]
+        candidates.sort(
+            key=lambda r: (r['distance'] is None, r['distance'] or 0)
+        )
+        order_candidates[order.id] = candidates
+    return order_candidates
+
+
+@user_passes_test(is_manager, login_url='restaurateur:login')
+def view_order_candidates(request):
+    """Отдать рестораны-кандидаты для заказов ?ids=1,2,3, которым ещё не назначен ресторан."""
+    orders = list(Order.objects.filter(
+        id__in=parse_order_ids(request.GET.get('ids', '')),
+        restaurant__isnull=True,
+    ))
+    candidates = find_order_candidates(orders)
+    return JsonResponse({
+        'candidates': {str(order_id): restaurants for order_id, restaurants in candidates.items()},
+    })
+
+
+def filter_orders(filter_form, orders):
+    if filter_form.is_valid():
+        return filter_form.filter(orders)
+    return orders.exclude(status=Order.StatusChoices.DELIVERED)
+
+
+def get_safe_position():
+    """Позиция, до которой все изменения заказов уже точно видны.
+
+    updated_at выставляется при сохранении, а транзакция фиксируется позже,
+    поэтому заказ может появиться в выборке с updated_at позади курсора.
+    Изменения младше ORDER_CHANGES_WINDOW считаются ещё не устоявшимися.
+    """
+    return timezone.now() - ORDER_CHANGES_WINDOW, 0
+
+
+def get_changes_cursor():
+    return encode_cursor(*get_safe_position())
+
+
+def get_next_changes_cursor(position, changes, limit=ORDER_CHANGES_LIMIT):
+    """Курсор следующего опроса после отданных изменений changes.
+
+    Курсор не уходит дальше безопасной позиции: последние изменения
+    перечитываются несколько опросов подряд, и клиент применяет их повторно,
+    заменяя строки по id. Если изменений набралось limit, курсор встаёт
+    на последнее из них, иначе опросы крутились бы на одной и той же пачке.
+    """
+    if len(changes) >= limit:
+        order_id, updated_at = changes[-1]
+        return encode_cursor(updated_at, order_id)
+    return encode_cursor(*max(position, get_safe_position()))
+
+
+def find_changed_orders(position, limit=ORDER_CHANGES_LIMIT):
+    """Вернуть [(id, updated_at)] заказов, изменённых после позиции (updated_at, id)."""
+    changes = Order.objects.order_by('updated_at', 'id')
+    if position:
+        updated_at, order_id = position
+        changes = changes.filter(
+            Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=order_id)
         )
+    return list(changes.values_list('id', 'updated_at')[:limit])
+
+
+@user_passes_test(is_manager, login_url='restaurateur:login')
+def view_order_changes(request):
+    """Отдать изменения заказов после курсора ?since=.
+
+    Ответ приходит сразу, без ожидания: страница сама опрашивает этот адрес
+    раз в несколько секунд, и синхронный воркер не занят между опросами.
+    Изменения ищутся дешёвым запросом по индексу updated_at, а изменения
+    за последние ORDER_CHANGES_WINDOW отдаются повторно, см. get_safe_position.
+    Отданные строки таблицы уже отфильтрованы как на странице заказов,
+    а заказы, которые под фильтр больше не подходят, перечислены в removed.
+    """
+    since = request.GET.get('since', '')
+    position = decode_cursor(since) if since else None
+    if not position:
+        return JsonResponse({'cursor': get_changes_cursor(), 'orders': [], 'removed': []})
+
+    changes = find_changed_orders(position)
+    cursor = get_next_changes_cursor(position, changes)
+    if not changes:
+        return JsonResponse({'cursor': cursor, 'orders': [], 'removed': []})
+
+    changed_ids = [order_id for order_id, _ in changes]
+    orders = Order.objects.select_related('restaurant').filter(id__in=changed_ids)
+    orders = filter_orders(OrderFilterForm(request.GET), orders).order_by('-created_at', '-id')
+    next_url = request.GET.get('next', '')
+    if not url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+        next_url = reverse('restaurateur:view_orders')
+
+    since_updated_at, _ = position
+    rows = [
+        {
+            'id': order.id,
+            'new': order.created_at > since_updated_at,
+            'html': render_to_string('order_item_row.html', {'item': order, 'currentUrl': next_url}),
+        }
+        for order in orders
+    ]
+    visible_ids = {row['id'] for row in rows}
+    return JsonResponse({
+        'cursor': cursor,
+        'orders': rows,
+        'removed': [order_id for order_id in changed_ids if order_id not in visible_ids],
+    })
+
+
+@user_passes_test(is_manager, login_url='restaurateur:login')
+def view_orders(request):
+    filter_form = OrderFilterForm(request.GET)
+    orders = Order.objects.select_related('restaurant')
+    orders = filter_orders(filter_form, orders)
+
+    changes_cursor = get_changes_cursor()
+    orders, next_cursor = paginate_orders(orders, request.GET.get('cursor'))
 
-        for restaurant, products in restaurant_products.items():
-            if products.intersection(order_products_ids):
-                try:
-                    distance = Distance.objects.get(
-                        restaurant=restaurant,
-                        order_address=order.address,
-                    )
-                except Distance.DoesNotExist:
-                    restaurant_coordinates = fetch_coordinates(API_KEY, restaurant.address)
-                    order_coordinates = fetch_coordinates(API_KEY, order.address)
-                    distance_in_km = get_distance_km(restaurant_coordinates, order_coordinates)
-                    distance = Distance.objects.create(
-                        restaurant=restaurant,
-                        order_address=order.address,
-                        distance=distance_in_km
-                    )
-                restaurant_info = {
-                    'name': restaurant.name,
-                    'distance': distance.distance,
-                }
-                available_restaurants.append(restaurant_info)
-
-        available_restaurants = sorted(available_restaurants, key=lambda r: r['distance'])
-        order.available_restaurants = available_restaurants
+    next_page_params = request.GET.copy()
+    next_page_params['cursor'] = next_cursor
+    first_page_params = request.GET.copy()
+    first_page_params.pop('cursor', None)
 
     return render(request, template_name='order_items.html', context={
         'order_items': orders,
-        'currentUrl': request.path,
+        'filter_form': filter_form,
+        'next_page_query': next_page_params.urlencode() if next_cursor else None,
+        'first_page_query': first_page_params.urlencode() if 'cursor' in request.GET else None,
+        'changes_cursor': changes_cursor,
+        'currentUrl': request.get_full_path(),
     })
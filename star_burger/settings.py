@@ -16,6 +16,10 @@ DEBUG = env.bool('DEBUG', False)
 ALLOWED_HOSTS = env.list('ALLOWED_HOSTS', ['127.0.0.1', 'localhost'])
 
 API_KEY = env.str('API_KEY')
+GEOCODER = {
+    'BACKEND': env.str('GEOCODER_BACKEND', 'places.backends.YandexGeocoder'),
+    'OPTIONS': env.json('GEOCODER_OPTIONS', '{}'),
+}
 ROLLBAR_TOKEN = env.str('ROLLBAR_TOKEN', None)
 ROLLBAR_ENVIRONMENT = env.str('ROLLBAR_ENVIRONMENT', 'development')
 
@@ -25,6 +29,7 @@ INSTALLED_APPS = [
     'foodcartapp.apps.FoodcartappConfig',
     'restaurateur.apps.RestaurateurConfig',
     'distances.apps.DistancesConfig',
+    'places.apps.PlacesConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -95,6 +100,17 @@ DATABASES = {
     ),
 }
 
+CACHES = {
+    'default': env.dj_cache_url('CACHE_URL', 'db://django_cache'),
+}
+
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'foodcartapp.fast_json.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
 ROLLBAR = {
     'access_token': ROLLBAR_TOKEN,
     'environment': ROLLBAR_ENVIRONMENT,